@@ -0,0 +1,105 @@
+import json
+import time
+import uuid
+from pathlib import Path
+
+from .utils import write_json_atomic
+
+PENDING = "pending"
+IN_FLIGHT = "in_flight"
+DONE = "done"
+FAILED = "failed"
+
+
+class BulkCheckpoint:
+    def __init__(self, path, run_id, operation, services, states=None,
+                 created=None, completed=False):
+        self.path = Path(path)
+        self.run_id = run_id
+        self.operation = operation
+        self.services = list(services)
+        self.states = states or {name: PENDING for name in self.services}
+        self.created = created or time.time()
+        self.completed = completed
+
+    @classmethod
+    def create(cls, runs_dir, operation, services):
+        run_id = time.strftime("%Y%m%d-%H%M%S") + "-" + uuid.uuid4().hex[:6]
+        checkpoint = cls(Path(runs_dir) / f"{run_id}.json",
+                         run_id, operation, services)
+        checkpoint.save()
+        return checkpoint
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "r") as f:
+            data = json.load(f)
+        return cls(path, data["run_id"], data["operation"], data["services"],
+                   states=data["states"], created=data["created"],
+                   completed=data["completed"])
+
+    @classmethod
+    def find(cls, runs_dir, operation, run_id=None):
+        runs_dir = Path(runs_dir)
+        if run_id is not None:
+            checkpoint = cls._try_load(runs_dir / f"{run_id}.json")
+            if checkpoint is None or checkpoint.operation != operation:
+                return None
+            return checkpoint
+
+        runs = [checkpoint for checkpoint in map(
+            cls._try_load, runs_dir.glob("*.json"))
+            if checkpoint and checkpoint.operation == operation]
+        # A run that a later run of the same operation completed after is
+        # stale: resuming it would re-apply an outdated service list.
+        superseded = max((checkpoint.created for checkpoint in runs
+                          if checkpoint.completed), default=None)
+        candidates = [checkpoint for checkpoint in runs
+                      if not checkpoint.completed and (
+                          superseded is None or checkpoint.created > superseded)]
+        return max(candidates, key=lambda c: c.created, default=None)
+
+    @classmethod
+    def _try_load(cls, path):
+        try:
+            return cls.load(path)
+        except (OSError, ValueError, KeyError):
+            return None
+
+    @classmethod
+    def prune(cls, runs_dir, keep=20):
+        # Unfinished runs are kept however old they are so they can still
+        # be resumed; only completed runs count towards the limit.
+        completed = [checkpoint for checkpoint in map(
+            cls._try_load, Path(runs_dir).glob("*.json"))
+            if checkpoint and checkpoint.completed]
+        completed.sort(key=lambda checkpoint: checkpoint.created)
+        for checkpoint in completed[:-keep] if keep else completed:
+            checkpoint.path.unlink()
+
+    def save(self):
+        write_json_atomic(self.path, {
+            "run_id": self.run_id,
+            "operation": self.operation,
+            "services": self.services,
+            "states": self.states,
+            "created": self.created,
+            "completed": self.completed,
+        }, fsync=True, indent=2)
+
+    def mark(self, service_name, state):
+        self.states[service_name] = state
+        self.save()
+
+    def in_flight(self):
+        return [name for name in self.services
+                if self.states.get(name) == IN_FLIGHT]
+
+    def remaining(self):
+        return [name for name in self.services
+                if self.states.get(name) != DONE]
+
+    def complete(self):
+        self.completed = not self.remaining()
+        self.save()
+        return self.completed
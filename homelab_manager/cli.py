@@ -1,6 +1,16 @@
+import time
+
 import click
 
 from .config import Config
+from .disk_usage import DiskReclaimer, format_size
+from .image_prefetcher import ImagePrefetcher
+from .interactive import InteractiveShell
+from .journal import PERIODS, summarize_journal
+from .log_archive import (LogArchive, LogCollector, format_timestamp,
+                          parse_duration)
+from .placement import PlacementEngine
+from .rolling import RollingExecutor
 from .service_manager import ServiceManager
 
 
@@ -35,20 +45,112 @@ def stop(manager, service_name):
         exit(1)
 
 
+def resume_options(command):
+    command = click.option(
+        "--run-id", help="Resume this run instead of the latest one")(command)
+    return click.option(
+        "--resume", is_flag=True,
+        help="Continue the last interrupted run of this command")(command)
+
+
 @cli.command()
+@resume_options
 @click.pass_obj
-def start_all(manager):
+def start_all(manager, resume, run_id):
     """Start all enabled services"""
-    manager.start_all_services()
-    click.echo("All enabled services have been started.")
+    if manager.start_all_services(resume=resume, run_id=run_id):
+        click.echo("All enabled services have been started.")
+    else:
+        click.echo("Some services failed to start. "
+                   "Rerun with --resume to retry only those.")
+        exit(1)
 
 
 @cli.command()
+@resume_options
 @click.pass_obj
-def stop_all(manager):
+def stop_all(manager, resume, run_id):
     """Stop all services"""
-    manager.stop_all_services()
-    click.echo("All services have been stopped.")
+    if manager.stop_all_services(resume=resume, run_id=run_id):
+        click.echo("All services have been stopped.")
+    else:
+        click.echo("Some services failed to stop. "
+                   "Rerun with --resume to retry only those.")
+        exit(1)
+
+
+def rolling_options(command):
+    command = click.option(
+        "--no-health-check", is_flag=True,
+        help="Only wait for containers to be running")(command)
+    command = click.option(
+        "--health-timeout", type=int, default=120, show_default=True,
+        help="Seconds to wait for each wave to become healthy")(command)
+    command = click.option(
+        "--rollback", is_flag=True,
+        help="Roll back updated services when a wave fails")(command)
+    command = click.option(
+        "--max-failure-rate", type=float, default=0.0, show_default=True,
+        help="Fraction of a wave allowed to fail before stopping")(command)
+    command = click.option(
+        "--wave-size", default="1", show_default=True,
+        help="Services per wave, as a count or percentage like 25%")(command)
+    command = click.option(
+        "--all", "all_services", is_flag=True,
+        help="Apply to all enabled services")(command)
+    return click.argument("service_names", nargs=-1)(command)
+
+
+def run_rolling(manager, operation, service_names, all_services, wave_size,
+                max_failure_rate, rollback, health_timeout, no_health_check):
+    if all_services:
+        service_names = [s["name"] for s in manager.config.get_enabled_services()]
+    if not service_names:
+        click.echo("No services given. Pass service names or --all.")
+        exit(1)
+
+    executor = RollingExecutor(
+        manager,
+        wave_size=wave_size,
+        max_failure_rate=max_failure_rate,
+        rollback=rollback,
+        require_healthy=not no_health_check,
+        health_timeout=health_timeout,
+    )
+    try:
+        report = executor.run(operation, list(service_names))
+    except ValueError as e:
+        click.echo(str(e))
+        exit(1)
+
+    for wave in report["waves"]:
+        failed = ", ".join(wave["failed"]) or "none"
+        click.echo(
+            f"Wave {wave['wave']}: {', '.join(wave['services'])} "
+            f"(apply {wave['apply_seconds']:.1f}s, "
+            f"health {wave['health_seconds']:.1f}s, failed: {failed})")
+    if report["rolled_back"]:
+        click.echo(f"Rolled back: {', '.join(report['rolled_back'])}")
+    if report["aborted"] or any(wave["failed"] for wave in report["waves"]):
+        click.echo(f"Rolling {operation} did not complete successfully.")
+        exit(1)
+    click.echo(f"Rolling {operation} completed successfully.")
+
+
+@cli.command()
+@rolling_options
+@click.pass_obj
+def restart(manager, **options):
+    """Restart services in health-gated waves"""
+    run_rolling(manager, "restart", **options)
+
+
+@cli.command()
+@rolling_options
+@click.pass_obj
+def update(manager, **options):
+    """Pull and recreate services in health-gated waves"""
+    run_rolling(manager, "update", **options)
 
 
 @cli.command()
@@ -60,5 +162,255 @@ def status(manager):
         click.echo(f"{service}: {status}")
 
 
+@cli.command()
+@click.argument("service_names", nargs=-1)
+@click.pass_obj
+def sync(manager, service_names):
+    """Copy changed compose and env files to remote hosts"""
+    results = manager.sync_remote_files(service_names or None)
+    if not results:
+        click.echo("No remote services to sync.")
+    for service, result in sorted(results.items()):
+        click.echo(f"{service}: {result}")
+    if "failed" in results.values():
+        exit(1)
+
+
+def print_reclaimable(reports):
+    by_service = {}
+    for host, report in sorted(reports.items()):
+        if report.get("error"):
+            click.echo(f"{host}: error: {report['error']}")
+            continue
+        click.echo(f"{host}:")
+        for item_type, (total, reclaimable) in sorted(report["totals"].items()):
+            click.echo(f"  {item_type + 's':<12}{format_size(total):>10} total"
+                       f"{format_size(reclaimable):>10} reclaimable")
+        for item in report["items"]:
+            key = item["service"] or "(unattributed)"
+            by_service[key] = by_service.get(key, 0) + item["bytes"]
+    if by_service:
+        click.echo("Reclaimable by service:")
+        for service, size in sorted(by_service.items()):
+            click.echo(f"  {service:<24}{format_size(size):>10}")
+
+
+@cli.command()
+@click.option("--host", "hosts", multiple=True, help="Only these hosts")
+@click.pass_obj
+def df(manager, hosts):
+    """Show Docker disk usage and reclaimable space per host and service"""
+    reclaimer = DiskReclaimer(manager.config, manager.compose_handler)
+    print_reclaimable(reclaimer.collect(hosts or None))
+
+
+@cli.command()
+@click.option("--host", "hosts", multiple=True, help="Only these hosts")
+@click.option("--dry-run", is_flag=True, help="Show what would be removed")
+@click.pass_obj
+def prune(manager, hosts, dry_run):
+    """Remove stopped containers, unused images and orphaned volumes"""
+    reclaimer = DiskReclaimer(manager.config, manager.compose_handler)
+    reports = reclaimer.prune(hosts or None, dry_run=dry_run)
+    total = 0
+    for host, report in sorted(reports.items()):
+        for item in report["items"]:
+            if dry_run:
+                click.echo(f"{host}: would remove {item['type']} "
+                           f"{item['name']} ({format_size(item['bytes'])})")
+            elif not item["removed"]:
+                click.echo(f"{host}: could not remove {item['type']} "
+                           f"{item['name']}")
+                continue
+            total += item["bytes"]
+    verb = "Would free" if dry_run else "Freed"
+    click.echo(f"{verb} {format_size(total)}.")
+    if any(report.get("error") for report in reports.values()):
+        exit(1)
+
+
+@cli.command()
+@click.option("--apply", "apply_plan", is_flag=True,
+              help="Save the assignments to the config file")
+@click.option("--observe", is_flag=True,
+              help="Use current container usage when compose has no limits")
+@click.option("--strategy", type=click.Choice(["spread", "pack"]),
+              default="spread", show_default=True,
+              help="Balance load across hosts or fill hosts in turn")
+@click.pass_obj
+def place(manager, apply_plan, observe, strategy):
+    """Assign services with "host": "auto" to hosts by capacity"""
+    engine = PlacementEngine(manager.config, manager.compose_handler)
+    hosts = engine.candidate_hosts()
+    inventory = engine.host_inventory(hosts)
+    observed = engine.observe_usage(hosts) if observe else None
+    plan = engine.plan(inventory, observed=observed, strategy=strategy)
+
+    for service, host in sorted(plan["assignments"].items()):
+        click.echo(f"{service}: {host}")
+    for service in plan["unplaced"]:
+        click.echo(f"{service}: no host has enough capacity")
+    for host, state in sorted(plan["hosts"].items()):
+        usage = []
+        for resource in ("cpus", "memory", "disk"):
+            capacity = state["capacity"].get(resource)
+            used = state["used"][resource]
+            usage.append(f"{resource} {used / capacity:.0%}" if capacity
+                         else f"{resource} ?")
+        click.echo(f"[{host}] " + ", ".join(usage))
+
+    if apply_plan:
+        changed = engine.apply(plan)
+        click.echo(f"Updated placement for {changed} services.")
+    if plan["unplaced"]:
+        exit(1)
+
+
+@cli.command()
+@click.pass_obj
+def health(manager):
+    """Check health of all enabled services"""
+    if manager.check_all_services_healthy():
+        click.echo("All enabled services are healthy.")
+    else:
+        exit(1)
+
+
+@cli.command()
+@click.argument("service_names", nargs=-1)
+@click.option("--workers", type=int, help="Maximum concurrent image pulls")
+@click.option("--force", is_flag=True, help="Pull even if images are warm")
+@click.option("--watch", type=int, help="Repeat every N seconds")
+@click.option("--max-load", type=float,
+              help="Only prefetch while the load average is below this")
+@click.pass_obj
+def prefetch(manager, service_names, workers, force, watch, max_load):
+    """Pull images for enabled services ahead of time"""
+    prefetcher = ImagePrefetcher(
+        manager.config,
+        manager.compose_handler,
+        manager.docker_utils,
+        max_workers=workers)
+    if watch:
+        prefetcher.run_forever(watch, max_load=max_load)
+        return
+
+    results = prefetcher.prefetch(service_names or None, force=force)
+    if not results:
+        click.echo("All images are already warm.")
+    for image, success in results.items():
+        click.echo(f"{image}: {'pulled' if success else 'failed'}")
+    if not all(results.values()):
+        exit(1)
+
+
+@cli.command()
+@click.pass_obj
+def interactive(manager):
+    """Manage services from a persistent interactive shell"""
+    prefetcher = ImagePrefetcher(
+        manager.config, manager.compose_handler, manager.docker_utils)
+    InteractiveShell(manager, prefetcher=prefetcher).cmdloop()
+
+
+@cli.group()
+def archive():
+    """Collect and search archived container logs"""
+
+
+@archive.command()
+@click.argument("service_names", nargs=-1)
+@click.option("--watch", type=int, help="Repeat every N seconds")
+@click.pass_obj
+def collect(manager, service_names, watch):
+    """Copy new container output into the local log archive"""
+    log_archive = LogArchive.from_config(manager.config)
+    collector = LogCollector(manager.config, log_archive, manager.docker_utils)
+    if watch:
+        collector.run_forever(watch)
+        return
+    for service, count in collector.collect(service_names or None).items():
+        click.echo(f"{service}: {count} new lines")
+
+
+@archive.command()
+@click.argument("term")
+@click.option("--since", help="Only search this far back, e.g. 30m, 2h, 7d")
+@click.option("--service", "services", multiple=True,
+              help="Only search these services")
+@click.pass_obj
+def search(manager, term, since, services):
+    """Search archived logs for a term"""
+    log_archive = LogArchive.from_config(manager.config)
+    try:
+        since_time = time.time() - parse_duration(since) if since else None
+    except ValueError as e:
+        click.echo(str(e))
+        exit(1)
+    for timestamp, service, line in log_archive.search(
+            term, since=since_time, services=services or None):
+        click.echo(f"{format_timestamp(timestamp)} {service}: {line}")
+
+
+@cli.group()
+def perf():
+    """Inspect recorded operation latencies"""
+
+
+def format_seconds(seconds):
+    if seconds is None:
+        return "-"
+    return f"{seconds * 1000:.0f}ms" if seconds < 1 else f"{seconds:.1f}s"
+
+
+@perf.command()
+@click.option("--service", help="Only include this service")
+@click.option("--command", "command_name", help="Only include this command")
+@click.option("--kind", type=click.Choice(["operation", "compose"]),
+              help="Only include manager operations or compose invocations")
+@click.option("--since", help="Only include this far back, e.g. 30m, 2h, 7d")
+@click.option("--trend", type=click.Choice(sorted(PERIODS)),
+              help="Show percentiles per hour, day or week")
+@click.pass_obj
+def report(manager, service, command_name, kind, since, trend):
+    """Show p50/p95/p99 latency per service and command"""
+    try:
+        since_time = time.time() - parse_duration(since) if since else None
+    except ValueError as e:
+        click.echo(str(e))
+        exit(1)
+    summary, trends = summarize_journal(
+        manager.journal.iter_records(),
+        period=trend,
+        since=since_time,
+        service=service,
+        command=command_name,
+        kind=kind,
+    )
+    if not summary:
+        click.echo("No operations recorded.")
+        return
+
+    click.echo(f"{'KIND':<10}{'SERVICE':<20}{'COMMAND':<16}{'COUNT':>7}"
+               f"{'FAIL':>6}{'P50':>9}{'P95':>9}{'P99':>9}")
+    for key in sorted(summary, key=lambda k: tuple(str(part) for part in k)):
+        kind_name, service_name, command = key
+        histogram = summary[key]
+        click.echo(
+            f"{kind_name:<10}{service_name or '-':<20}{command:<16}"
+            f"{histogram.count:>7}{histogram.failures:>6}"
+            f"{format_seconds(histogram.percentile(50)):>9}"
+            f"{format_seconds(histogram.percentile(95)):>9}"
+            f"{format_seconds(histogram.percentile(99)):>9}")
+        for bucket, period_histogram in sorted(trends.get(key, {}).items()):
+            started = time.strftime("%Y-%m-%d %H:%M", time.localtime(bucket))
+            click.echo(
+                f"{'':<10}{started:<36}{period_histogram.count:>7}"
+                f"{period_histogram.failures:>6}"
+                f"{format_seconds(period_histogram.percentile(50)):>9}"
+                f"{format_seconds(period_histogram.percentile(95)):>9}"
+                f"{format_seconds(period_histogram.percentile(99)):>9}")
+
+
 if __name__ == "__main__":
     cli()
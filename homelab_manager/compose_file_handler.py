@@ -1,14 +1,17 @@
 import os
+import re
 import subprocess
 import tempfile
 from pathlib import Path
 
 import requests
+import yaml
 
 
 class ComposeFileHandler:
-    def __init__(self, config):
+    def __init__(self, config, journal=None):
         self.config = config
+        self.journal = journal
         self.base_dir = Path(
             os.path.dirname(
                 os.path.abspath(
@@ -44,22 +47,76 @@ class ComposeFileHandler:
                 print(f"Compose file not found: {full_path}")
                 return None
 
+    def load_compose(self, service_name):
+        compose_file = self.get_compose_file(service_name)
+        if not compose_file:
+            return None
+
+        try:
+            with open(compose_file, "r") as f:
+                return yaml.safe_load(f) or {}
+        except (OSError, yaml.YAMLError) as e:
+            print(f"Failed to parse compose file for {service_name}: {e}")
+            return None
+
+    def get_compose_images(self, service_name):
+        compose = self.load_compose(service_name)
+        if not compose:
+            return []
+
+        images = []
+        for definition in (compose.get("services") or {}).values():
+            image = (definition or {}).get("image")
+            if image:
+                image = os.path.expandvars(str(image))
+                if image not in images:
+                    images.append(image)
+        return images
+
+    def get_compose_project(self, service_name):
+        compose = self.load_compose(service_name) or {}
+        if compose.get("name"):
+            return str(compose["name"])
+        compose_file = self.get_compose_file(service_name)
+        if not compose_file:
+            return None
+        directory = Path(compose_file).parent.name.lower()
+        return re.sub(r"[^a-z0-9_-]", "", directory)
+
     def run_docker_compose(self, service_name, command):
+        if self.journal is None:
+            return self._run_docker_compose(service_name, command, {})
+
+        with self.journal.record(
+                "compose", service_name, " ".join(command)) as entry:
+            success = self._run_docker_compose(service_name, command, entry)
+            entry["ok"] = success
+        return success
+
+    def _run_docker_compose(self, service_name, command, entry):
         compose_file = self.get_compose_file(service_name)
         if not compose_file:
             print(f"docker-compose file not found for service {service_name}")
             return False
 
+        if command and command[0] in ("up", "down"):
+            command = command + ["--remove-orphans"]
+
         try:
             result = subprocess.run(
-                ["docker-compose", "-f", compose_file] + command + ["--remove-orphans"],
+                ["docker-compose", "-f", compose_file] + command,
                 check=True,
                 capture_output=True,
                 text=True,
             )
+            entry["exit_code"] = result.returncode
+            entry["output_bytes"] = len(result.stdout or "") + \
+                len(result.stderr or "")
             print(f"Command output: {result.stdout}")
             return True
         except subprocess.CalledProcessError as e:
+            entry["exit_code"] = e.returncode
+            entry["output_bytes"] = len(e.stdout or "") + len(e.stderr or "")
             print(f"Docker compose command failed for {service_name}: {e}")
             print(f"Error output: {e.stdout}")
             print(f"Error: {e.stderr}")
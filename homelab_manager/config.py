@@ -1,3 +1,4 @@
+import hashlib
 import json
 import os
 from pathlib import Path
@@ -18,9 +19,62 @@ class Config:
         with open(self.config_path, "w") as f:
             json.dump(self.config, f, indent=2)
 
+    def get_config_id(self):
+        path = str(self.config_path.resolve())
+        return hashlib.sha1(path.encode()).hexdigest()[:12]
+
+    def get_defaults(self):
+        return self.config.get("defaults", {})
+
+    def get_state_dir(self):
+        state_dir = os.environ.get("HOMELAB_STATE_DIR") or self.get_defaults().get(
+            "state_dir", "~/.local/state/homelab-manager")
+        return Path(state_dir).expanduser()
+
     def get_services(self):
         return self.config["services"]
 
+    def get_service(self, service_name):
+        return next((s for s in self.get_services()
+                     if s["name"] == service_name), None)
+
+    def get_service_probes(self, service_name):
+        service = self.get_service(service_name)
+        return service.get("probes", []) if service else []
+
+    def get_service_dependencies(self, service_name):
+        service = self.get_service(service_name)
+        return service.get("depends_on", []) if service else []
+
+    def get_hosts(self):
+        return self.config.get("hosts", {})
+
+    def get_service_host(self, service):
+        host = service.get("host", "local")
+        if host == "auto":
+            return service.get("placed_host", "local")
+        return host
+
+    def is_remote_service(self, service):
+        return self.get_service_host(service) not in ("local", "localhost")
+
+    def get_host_settings(self, host):
+        defaults = self.get_defaults()
+        entry = self.get_hosts().get(host, {})
+        return {
+            "host": host,
+            "user": entry.get("ssh_user", defaults.get("ssh_user")),
+            "key": entry.get("ssh_key", defaults.get("ssh_key")),
+            "port": entry.get("ssh_port", defaults.get("ssh_port", 22)),
+        }
+
+    def get_ssh_settings(self, service):
+        settings = self.get_host_settings(self.get_service_host(service))
+        settings["user"] = service.get("ssh_user", settings["user"])
+        settings["key"] = service.get("ssh_key", settings["key"])
+        settings["port"] = service.get("ssh_port", settings["port"])
+        return settings
+
     def is_service_enabled(self, service_name):
         return any(s["name"] == service_name and s["enabled"]
                    for s in self.get_services())
@@ -0,0 +1,286 @@
+import json
+import re
+import shlex
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from .remote_sync import HostShell
+from .utils import parallel_operations
+
+SIZE_UNITS = {"b": 1, "kb": 10**3, "mb": 10**6, "gb": 10**9, "tb": 10**12}
+REMOVE_COMMANDS = {
+    "container": "docker rm -f",
+    "image": "docker rmi",
+    "volume": "docker volume rm",
+}
+STOPPED_STATES = ("exited", "created", "dead")
+
+
+def parse_size(size):
+    match = re.match(r"\s*([\d.]+)\s*([kKmMgGtT]?[bB])", str(size or ""))
+    if not match:
+        return 0
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2).lower()])
+
+
+def format_size(size):
+    for unit in ("B", "kB", "MB", "GB"):
+        if size < 1000:
+            return f"{size:.0f}{unit}" if unit == "B" else f"{size:.1f}{unit}"
+        size /= 1000
+    return f"{size:.1f}TB"
+
+
+def image_ref(image):
+    # Docker lists Hub images without the registry and library/ prefixes,
+    # so compose references are reduced to the same form before comparing.
+    for prefix in ("docker.io/", "index.docker.io/", "registry-1.docker.io/"):
+        if image.startswith(prefix):
+            image = image[len(prefix):]
+            break
+    if image.startswith("library/") and image.count("/") == 1:
+        image = image[len("library/"):]
+    if "@" in image or ":" in image.rsplit("/", 1)[-1]:
+        return image
+    return f"{image}:latest"
+
+
+def image_digest(image):
+    return image.partition("@")[2] or None
+
+
+def image_repository(image):
+    image = image.partition("@")[0]
+    name, _, tag = image.rpartition(":")
+    return name if name and "/" not in tag else image
+
+
+def built_images(project, compose_service):
+    # Services with build: and no image: are tagged after the project and
+    # service, joined with "-" by compose v2 and "_" by compose v1.
+    compose_service = str(compose_service).lower()
+    return {image_ref(f"{project}{sep}{compose_service}") for sep in "-_"}
+
+
+class DiskReclaimer:
+    def __init__(self, config, compose_handler, transport=None,
+                 local_transport=None, max_workers=None, batch_size=50):
+        self.config = config
+        self.compose_handler = compose_handler
+        self.shell = HostShell(transport, local_transport)
+        self.max_workers = max_workers or parallel_operations(config)
+        self.batch_size = batch_size
+
+    def hosts(self, host_names=None):
+        hosts = {"local": {"host": "local"}}
+        for service in self.config.get_services():
+            if self.config.is_remote_service(service):
+                settings = self.config.get_ssh_settings(service)
+                hosts.setdefault(settings["host"], settings)
+        if host_names:
+            hosts = {name: settings for name, settings in hosts.items()
+                     if name in host_names}
+        return hosts
+
+    def run(self, settings, command):
+        return self.shell.run(settings, command)
+
+    def ownership(self):
+        owners = {"images": {}, "repositories": {}, "digests": {},
+                  "containers": {}, "projects": {}, "volumes": {}}
+        protected = {"images": set(), "digests": set(), "containers": set(),
+                     "projects": set(), "volumes": set()}
+        for service in self.config.get_services():
+            name = service["name"]
+            compose = self.compose_handler.load_compose(name) or {}
+            project = self.compose_handler.get_compose_project(name)
+            images = {image_ref(image) for image in
+                      self.compose_handler.get_compose_images(name)}
+            digests = {image_digest(image) for image in images} - {None}
+            containers = {name}
+            for compose_service, definition in \
+                    (compose.get("services") or {}).items():
+                definition = definition or {}
+                if definition.get("container_name"):
+                    containers.add(str(definition["container_name"]))
+                if project and definition.get("build") \
+                        and not definition.get("image"):
+                    images.update(built_images(project, compose_service))
+            volumes = set()
+            for volume, definition in (compose.get("volumes") or {}).items():
+                definition = definition or {}
+                if definition.get("name"):
+                    volumes.add(str(definition["name"]))
+                elif definition.get("external"):
+                    volumes.add(volume)
+                elif project:
+                    volumes.add(f"{project}_{volume}")
+
+            for image in images:
+                owners["images"].setdefault(image, name)
+                owners["repositories"].setdefault(image_repository(image), name)
+            for digest in digests:
+                owners["digests"].setdefault(digest, name)
+            for container in containers:
+                owners["containers"].setdefault(container, name)
+            for volume in volumes:
+                owners["volumes"].setdefault(volume, name)
+            if project:
+                owners["projects"].setdefault(project, name)
+
+            if service["enabled"]:
+                protected["images"].update(images)
+                protected["digests"].update(digests)
+                protected["containers"].update(containers)
+                protected["volumes"].update(volumes)
+                if project:
+                    protected["projects"].add(project)
+        return owners, protected
+
+    def container_project(self, container):
+        labels = container.get("Labels") or ""
+        for label in labels.split(","):
+            key, _, value = label.partition("=")
+            if key == "com.docker.compose.project":
+                return value
+        return None
+
+    def container_owner(self, names, project, owners):
+        for name in names:
+            if name in owners["containers"]:
+                return owners["containers"][name]
+        if project in owners["projects"]:
+            return owners["projects"][project]
+        for name in names:
+            for known, service in owners["projects"].items():
+                if name.startswith((f"{known}-", f"{known}_")):
+                    return service
+        return None
+
+    def container_protected(self, names, project, protected):
+        if project in protected["projects"]:
+            return True
+        return any(
+            name in protected["containers"]
+            or name.startswith(tuple(
+                f"{p}{sep}" for p in protected["projects"] for sep in "-_"))
+            for name in names)
+
+    def collect_host(self, host, settings, owners, protected):
+        # A single `docker system df -v` call reports images, containers
+        # and volumes with their sizes, instead of one query per object.
+        output = self.run(settings, "docker system df -v --format '{{json .}}'")
+        usage = json.loads(output or "{}")
+        totals = {}
+        items = []
+
+        for image in usage.get("Images") or []:
+            size = parse_size(image.get("Size"))
+            totals.setdefault("image", [0, 0])[0] += size
+            ref = image_ref(f"{image.get('Repository')}:{image.get('Tag')}")
+            digest = image.get("Digest")
+            if ref in protected["images"] or digest in protected["digests"] \
+                    or str(image.get("Containers")) != "0":
+                continue
+            unique = parse_size(image.get("UniqueSize")) or size
+            totals["image"][1] += unique
+            items.append({
+                "host": host, "type": "image", "id": image.get("ID"),
+                "name": ref, "bytes": unique,
+                "service": owners["images"].get(ref) or
+                owners["digests"].get(digest) or
+                owners["repositories"].get(image_repository(ref)),
+            })
+
+        for container in usage.get("Containers") or []:
+            size = parse_size(container.get("Size"))
+            totals.setdefault("container", [0, 0])[0] += size
+            if container.get("State") not in STOPPED_STATES:
+                continue
+            names = str(container.get("Names", "")).split(",")
+            project = self.container_project(container)
+            if self.container_protected(names, project, protected):
+                continue
+            totals["container"][1] += size
+            items.append({
+                "host": host, "type": "container", "id": container.get("ID"),
+                "name": names[0], "bytes": size,
+                "service": self.container_owner(names, project, owners),
+            })
+
+        for volume in usage.get("Volumes") or []:
+            size = parse_size(volume.get("Size"))
+            totals.setdefault("volume", [0, 0])[0] += size
+            name = volume.get("Name")
+            if name in protected["volumes"] or str(volume.get("Links")) != "0":
+                continue
+            totals["volume"][1] += size
+            items.append({
+                "host": host, "type": "volume", "id": name, "name": name,
+                "bytes": size, "service": owners["volumes"].get(name),
+            })
+
+        return {"host": host, "totals": totals, "items": items}
+
+    def collect(self, host_names=None):
+        owners, protected = self.ownership()
+        hosts = self.hosts(host_names)
+        reports = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                host: executor.submit(
+                    self.collect_host, host, settings, owners, protected)
+                for host, settings in hosts.items()
+            }
+            for host, future in futures.items():
+                try:
+                    reports[host] = future.result()
+                except (subprocess.CalledProcessError, ValueError) as e:
+                    print(f"Failed to read disk usage on {host}: {e}")
+                    reports[host] = {"host": host, "totals": {},
+                                     "items": [], "error": str(e)}
+        return reports
+
+    def removal_script(self, items):
+        lines = []
+        # Containers go first so the images and volumes they held are free.
+        for item_type in ("container", "image", "volume"):
+            ids = [item["id"] for item in items if item["type"] == item_type]
+            for index in range(0, len(ids), self.batch_size):
+                batch = " ".join(shlex.quote(i)
+                                 for i in ids[index:index + self.batch_size])
+                lines.append(f"{REMOVE_COMMANDS[item_type]} {batch} || true")
+        return "\n".join(lines)
+
+    def prune(self, host_names=None, dry_run=False):
+        reports = self.collect(host_names)
+        if dry_run:
+            return reports
+
+        hosts = self.hosts(host_names)
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                host: executor.submit(
+                    self.run, hosts[host], self.removal_script(report["items"]))
+                for host, report in reports.items() if report["items"]
+            }
+            for host, future in futures.items():
+                try:
+                    future.result()
+                except subprocess.CalledProcessError as e:
+                    print(f"Failed to prune {host}: {e}")
+                    reports[host]["error"] = str(e)
+
+        # Every removal line ends in `|| true`, so look again to see what
+        # is actually gone instead of trusting the plan.
+        pruned = [host for host, report in reports.items() if report["items"]]
+        after = self.collect(pruned) if pruned else {}
+        for host in pruned:
+            if after[host].get("error"):
+                reports[host].setdefault("error", after[host]["error"])
+            remaining = {(item["type"], item["id"])
+                         for item in after[host]["items"]}
+            for item in reports[host]["items"]:
+                item["removed"] = not after[host].get("error") and \
+                    (item["type"], item["id"]) not in remaining
+        return reports
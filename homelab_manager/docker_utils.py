@@ -75,6 +75,24 @@ class DockerUtils:
         except subprocess.CalledProcessError:
             return False
 
+    def container_has_healthcheck(self, service_name):
+        try:
+            result = subprocess.run(
+                [
+                    "docker",
+                    "inspect",
+                    "--format",
+                    "{{if .State.Health}}yes{{end}}",
+                    service_name,
+                ],
+                check=True,
+                capture_output=True,
+                text=True,
+            )
+            return result.stdout.strip() == "yes"
+        except subprocess.CalledProcessError:
+            return False
+
     def remove_container(self, service_name):
         try:
             subprocess.run(["docker", "rm", "-f", service_name],
@@ -82,3 +100,47 @@ class DockerUtils:
             return True
         except subprocess.CalledProcessError:
             return False
+
+    def image_id(self, image):
+        try:
+            result = subprocess.run(
+                ["docker", "image", "inspect", "--format", "{{.Id}}", image],
+                check=True,
+                capture_output=True,
+                text=True,
+            )
+            return result.stdout.strip() or None
+        except subprocess.CalledProcessError:
+            return None
+
+    def pull_image(self, image):
+        try:
+            subprocess.run(["docker", "pull", "--quiet", image],
+                           check=True, capture_output=True)
+            return True
+        except subprocess.CalledProcessError:
+            return False
+
+    def tag_image(self, source, target):
+        try:
+            subprocess.run(["docker", "tag", source, target],
+                           check=True, capture_output=True)
+            return True
+        except subprocess.CalledProcessError:
+            return False
+
+    def container_logs(self, service_name, since=None):
+        command = ["docker", "logs", "--timestamps"]
+        if since is not None:
+            command += ["--since", f"{since:.6f}"]
+        try:
+            result = subprocess.run(
+                command + [service_name],
+                check=True,
+                capture_output=True,
+                text=True,
+            )
+            # docker logs replays the container's stderr on stderr.
+            return result.stdout + result.stderr
+        except subprocess.CalledProcessError:
+            return None
@@ -0,0 +1,233 @@
+import asyncio
+import ssl
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+class ProbeError(Exception):
+    pass
+
+
+class HttpConnectionPool:
+    def __init__(self, max_idle_per_host=8):
+        self.max_idle_per_host = max_idle_per_host
+        self.idle = {}
+
+    async def acquire(self, scheme, host, port):
+        connections = self.idle.get((scheme, host, port))
+        if connections:
+            return connections.pop(), True
+        ssl_context = ssl.create_default_context() if scheme == "https" else None
+        reader, writer = await asyncio.open_connection(host, port, ssl=ssl_context)
+        return (reader, writer), False
+
+    def release(self, scheme, host, port, connection):
+        connections = self.idle.setdefault((scheme, host, port), [])
+        if len(connections) < self.max_idle_per_host:
+            connections.append(connection)
+        else:
+            connection[1].close()
+
+    def close(self):
+        for connections in self.idle.values():
+            for _, writer in connections:
+                writer.close()
+        self.idle = {}
+
+
+class ProbeEngine:
+    def __init__(self, max_concurrency=256, default_timeout=5):
+        self.max_concurrency = max_concurrency
+        self.default_timeout = default_timeout
+        self.pool = HttpConnectionPool()
+        self._loop = None
+        self._lock = threading.Lock()
+
+    def run(self, probes_by_service):
+        if not any(probes_by_service.values()):
+            return {service: [] for service in probes_by_service}
+        # The loop outlives a single sweep so that idle keep-alive
+        # connections in the pool can be reused by the next one.
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+            return self._loop.run_until_complete(
+                self.run_async(probes_by_service))
+
+    def close(self):
+        with self._lock:
+            if self._loop is None:
+                return
+            self.pool.close()
+            # Let the transports finish closing before the loop goes away.
+            self._loop.run_until_complete(asyncio.sleep(0))
+            self._loop.close()
+            self._loop = None
+
+    async def run_async(self, probes_by_service):
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        services = list(probes_by_service)
+        groups = await asyncio.gather(*[
+            asyncio.gather(*[self._run_probe(probe, semaphore, self.pool)
+                             for probe in probes_by_service[service]])
+            for service in services
+        ])
+        return {service: list(group)
+                for service, group in zip(services, groups)}
+
+    async def _run_probe(self, probe, semaphore, pool):
+        probe_type = probe.get("type", "http")
+        timeout = probe.get("timeout", self.default_timeout)
+        result = {"type": probe_type, "target": describe_probe(probe)}
+        async with semaphore:
+            started = time.monotonic()
+            try:
+                if probe_type == "http":
+                    check = self._http_probe(probe, pool)
+                elif probe_type == "tcp":
+                    check = self._tcp_probe(probe)
+                elif probe_type == "command":
+                    check = self._command_probe(probe)
+                else:
+                    raise ProbeError(f"unknown probe type {probe_type}")
+                await asyncio.wait_for(check, timeout)
+                result.update(ok=True, detail="ok")
+            except asyncio.TimeoutError:
+                result.update(ok=False, detail=f"timed out after {timeout}s")
+            except KeyError as e:
+                result.update(ok=False, detail=f"probe is missing {e}")
+            except (OSError, EOFError, ValueError, TypeError, ProbeError) as e:
+                result.update(ok=False, detail=str(e) or e.__class__.__name__)
+            result["elapsed"] = time.monotonic() - started
+        return result
+
+    async def _tcp_probe(self, probe):
+        _, writer = await asyncio.open_connection(probe["host"], probe["port"])
+        writer.close()
+
+    async def _command_probe(self, probe):
+        command = probe["command"]
+        if isinstance(command, str):
+            process = await asyncio.create_subprocess_shell(
+                command,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.DEVNULL)
+        else:
+            process = await asyncio.create_subprocess_exec(
+                *command,
+                stdout=asyncio.subprocess.DEVNULL,
+                stderr=asyncio.subprocess.DEVNULL)
+        try:
+            returncode = await process.wait()
+        except asyncio.CancelledError:
+            process.kill()
+            raise
+        if returncode != 0:
+            raise ProbeError(f"command exited with {returncode}")
+
+    async def _http_probe(self, probe, pool):
+        url = urlsplit(probe["url"])
+        scheme = url.scheme or "http"
+        host = url.hostname
+        port = url.port or (443 if scheme == "https" else 80)
+        path = url.path or "/"
+        if url.query:
+            path += "?" + url.query
+
+        method = str(probe.get("method", "GET")).upper()
+        request = (
+            f"{method} {path} HTTP/1.1\r\n"
+            f"Host: {url.netloc}\r\n"
+            "User-Agent: homelab-manager\r\n"
+            "Connection: keep-alive\r\n\r\n"
+        ).encode()
+
+        while True:
+            connection, reused = await pool.acquire(scheme, host, port)
+            try:
+                status, body, keep_alive = await self._http_exchange(
+                    connection, request, method)
+                break
+            except (OSError, ProbeError, asyncio.IncompleteReadError):
+                connection[1].close()
+                # A reused keep-alive connection may have been closed by the
+                # server while idle; retry on a fresh one.
+                if not reused:
+                    raise
+            except BaseException:
+                connection[1].close()
+                raise
+
+        if keep_alive:
+            pool.release(scheme, host, port, connection)
+        else:
+            connection[1].close()
+
+        expected = probe.get("status")
+        if expected is None:
+            if not 200 <= status < 400:
+                raise ProbeError(f"HTTP {status}")
+        elif status not in (expected if isinstance(expected, list) else [expected]):
+            raise ProbeError(f"HTTP {status}, expected {expected}")
+
+        if "body" in probe and probe["body"] not in body.decode(errors="replace"):
+            raise ProbeError(f"response body does not contain {probe['body']!r}")
+
+    async def _http_exchange(self, connection, request, method="GET"):
+        reader, writer = connection
+        writer.write(request)
+        await writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise ProbeError("connection closed")
+        parts = status_line.decode("latin-1").split()
+        if len(parts) < 2 or not parts[1].isdigit():
+            raise ProbeError(f"invalid status line {status_line!r}")
+        version, status = parts[0], int(parts[1])
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        keep_alive = headers.get("connection", "").lower() != "close" and (
+            version != "HTTP/1.0" or
+            headers.get("connection", "").lower() == "keep-alive")
+
+        # Responses to HEAD, and 1xx/204/304 responses, never have a body,
+        # whatever their Content-Length says.
+        if method == "HEAD" or status in (204, 304) or 100 <= status < 200:
+            body = b""
+        elif headers.get("transfer-encoding", "").lower() == "chunked":
+            body = b""
+            while True:
+                size = int((await reader.readline()).split(b";")[0], 16)
+                if size == 0:
+                    while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                        pass
+                    break
+                body += await reader.readexactly(size)
+                await reader.readexactly(2)
+        elif "content-length" in headers:
+            body = await reader.readexactly(int(headers["content-length"]))
+        else:
+            body = await reader.read()
+            keep_alive = False
+        return status, body, keep_alive
+
+
+def describe_probe(probe):
+    probe_type = probe.get("type", "http")
+    if probe_type == "http":
+        return probe.get("url", "")
+    if probe_type == "tcp":
+        return f"{probe.get('host')}:{probe.get('port')}"
+    command = probe.get("command", "")
+    if isinstance(command, (list, tuple)):
+        return " ".join(str(part) for part in command)
+    return str(command)
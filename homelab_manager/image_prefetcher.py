@@ -0,0 +1,111 @@
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .utils import parallel_operations, run_periodically, write_json_atomic
+
+
+class ImagePrefetcher:
+    def __init__(self, config, compose_handler, docker_utils,
+                 max_workers=None, max_age=None):
+        self.config = config
+        self.compose_handler = compose_handler
+        self.docker_utils = docker_utils
+
+        defaults = config.get_defaults()
+        self.max_workers = max_workers or parallel_operations(
+            config, "prefetch_workers")
+        self.max_age = max_age if max_age is not None else defaults.get(
+            "prefetch_max_age", 86400)
+        self.record_path = config.get_state_dir() / "prefetch.json"
+
+        self._lock = threading.Lock()
+        self._in_flight = {}
+
+    def required_images(self, service_names=None):
+        images = {}
+        for service in self.config.get_enabled_services():
+            if service_names is not None and service["name"] not in service_names:
+                continue
+            for image in self.compose_handler.get_compose_images(
+                    service["name"]):
+                images.setdefault(image, []).append(service["name"])
+        return images
+
+    def load_record(self):
+        try:
+            with open(self.record_path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_record(self, record):
+        write_json_atomic(self.record_path, record, indent=2)
+
+    def needs_pull(self, image, record, force=False):
+        if force or self.docker_utils.image_id(image) is None:
+            return True
+        entry = record.get(image)
+        if not entry:
+            return True
+        return time.time() - entry.get("pulled_at", 0) > self.max_age
+
+    def prefetch(self, service_names=None, force=False):
+        images = self.required_images(service_names)
+        record = self.load_record()
+        pending = [image for image in images
+                   if self.needs_pull(image, record, force)]
+        if not pending:
+            return {}
+
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {image: self._submit(executor, image)
+                       for image in pending}
+            for image, future in futures.items():
+                results[image] = future.result()
+
+        with self._lock:
+            record = self.load_record()
+            for image, success in results.items():
+                if success:
+                    record[image] = {
+                        "id": self.docker_utils.image_id(image),
+                        "pulled_at": time.time(),
+                        "services": images[image],
+                    }
+            self.save_record(record)
+        return results
+
+    def _submit(self, executor, image):
+        # Concurrent prefetch runs in one process share a single pull per image.
+        with self._lock:
+            future = self._in_flight.get(image)
+            if future is None:
+                future = executor.submit(self._pull, image)
+                self._in_flight[image] = future
+            return future
+
+    def _pull(self, image):
+        try:
+            success = self.docker_utils.pull_image(image)
+            if not success:
+                print(f"Failed to pull image {image}")
+            return success
+        finally:
+            with self._lock:
+                self._in_flight.pop(image, None)
+
+    def is_idle(self, max_load):
+        if max_load is None or not hasattr(os, "getloadavg"):
+            return True
+        return os.getloadavg()[0] <= max_load
+
+    def run_forever(self, interval, max_load=None, stop_event=None):
+        def prefetch_when_idle():
+            if self.is_idle(max_load):
+                self.prefetch()
+
+        run_periodically(prefetch_when_idle, interval, stop_event)
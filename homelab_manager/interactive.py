@@ -0,0 +1,160 @@
+import cmd
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from .utils import parallel_operations
+
+
+class InteractiveShell(cmd.Cmd):
+    intro = "HomeLab Manager interactive mode. Type help or ? to list commands."
+    prompt = "dockerlab> "
+    identchars = cmd.Cmd.identchars + "-"
+
+    def __init__(self, manager, prefetcher=None, stdin=None, stdout=None):
+        super().__init__(stdin=stdin, stdout=stdout)
+        self.manager = manager
+        self.prefetcher = prefetcher
+        self.snapshot = {}
+        self.jobs = {}
+        self._next_job = 1
+        self._lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(
+            max_workers=parallel_operations(manager.config))
+
+    def echo(self, message):
+        print(message, file=self.stdout)
+
+    def parseline(self, line):
+        command, arg, line = super().parseline(line)
+        if command:
+            command = command.replace("-", "_")
+        return command, arg, line
+
+    def postcmd(self, stop, line):
+        self.report_finished_jobs()
+        return stop
+
+    def emptyline(self):
+        pass
+
+    def submit(self, description, func, *args):
+        with self._lock:
+            job_id = self._next_job
+            self._next_job += 1
+            future = self.executor.submit(func, *args)
+            self.jobs[job_id] = {
+                "description": description,
+                "future": future,
+                "started": time.monotonic(),
+                "reported": False,
+            }
+        self.echo(f"[{job_id}] {description} started in background")
+        return job_id
+
+    def report_finished_jobs(self):
+        with self._lock:
+            for job_id, job in self.jobs.items():
+                if job["reported"] or not job["future"].done():
+                    continue
+                job["reported"] = True
+                self.echo(f"[{job_id}] {job['description']}: "
+                          f"{self.describe_result(job['future'])}")
+
+    def describe_result(self, future):
+        try:
+            result = future.result()
+        except Exception as e:
+            return f"error ({e})"
+        return "failed" if result is False else "done"
+
+    def refresh_status(self, full=False):
+        changed = {}
+        current = {}
+        services = self.manager.config.get_services()
+        probe_results = self.manager.run_probes(services)
+        for service in services:
+            name = service["name"]
+            current[name] = self.manager.service_status(name, probe_results)
+            if full or self.snapshot.get(name) != current[name]:
+                changed[name] = current[name]
+        removed = [name for name in self.snapshot if name not in current]
+        self.snapshot = current
+        return changed, removed
+
+    def do_status(self, arg):
+        """status [--full]: show services whose status changed since the last refresh"""
+        changed, removed = self.refresh_status(full=arg.strip() == "--full")
+        for name, status in changed.items():
+            self.echo(f"{name}: {status}")
+        for name in removed:
+            self.echo(f"{name}: removed")
+        if not changed and not removed:
+            self.echo("No changes.")
+
+    def do_start(self, arg):
+        """start SERVICE...: start services in the background"""
+        for service_name in arg.split():
+            self.submit(f"start {service_name}",
+                        self.manager.start_service, service_name)
+
+    def do_stop(self, arg):
+        """stop SERVICE...: stop services in the background"""
+        for service_name in arg.split():
+            self.submit(f"stop {service_name}",
+                        self.manager.stop_service, service_name)
+
+    def do_start_all(self, arg):
+        """start-all: start all enabled services in the background"""
+        self.submit("start-all", self.manager.start_all_services)
+
+    def do_stop_all(self, arg):
+        """stop-all: stop all services in the background"""
+        self.submit("stop-all", self.manager.stop_all_services)
+
+    def do_prefetch(self, arg):
+        """prefetch [SERVICE...]: pull images in the background"""
+        if self.prefetcher is None:
+            self.echo("Prefetching is not available.")
+            return
+        self.submit("prefetch", self.prefetcher.prefetch, arg.split() or None)
+
+    def do_jobs(self, arg):
+        """jobs: list background operations"""
+        with self._lock:
+            jobs = list(self.jobs.items())
+        for job_id, job in jobs:
+            if job["future"].done():
+                state = self.describe_result(job["future"])
+            else:
+                elapsed = time.monotonic() - job["started"]
+                state = f"running ({elapsed:.0f}s)"
+            self.echo(f"[{job_id}] {job['description']}: {state}")
+
+    def do_wait(self, arg):
+        """wait: block until all background operations finish"""
+        with self._lock:
+            futures = [job["future"] for job in self.jobs.values()]
+        for future in futures:
+            try:
+                future.result()
+            except Exception:
+                pass
+
+    def do_reload(self, arg):
+        """reload: re-read the configuration file"""
+        self.manager.config.load_config()
+        self.echo("Configuration reloaded.")
+
+    def do_quit(self, arg):
+        """quit: wait for background operations and exit"""
+        self.do_wait(arg)
+        self.executor.shutdown(wait=True)
+        self.manager.probe_engine.close()
+        return True
+
+    do_exit = do_quit
+
+    def do_EOF(self, arg):
+        self.echo("")
+        return self.do_quit(arg)
@@ -0,0 +1,166 @@
+import fcntl
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+
+class OperationJournal:
+    def __init__(self, path, max_bytes=10 * 1024 * 1024, backup_count=3):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @classmethod
+    def from_config(cls, config):
+        defaults = config.get_defaults()
+        return cls(
+            config.get_state_dir() / "journal.jsonl",
+            max_bytes=defaults.get("journal_max_bytes", 10 * 1024 * 1024),
+            backup_count=defaults.get("journal_backups", 3),
+        )
+
+    @contextmanager
+    def record(self, kind, service, command):
+        entry = {
+            "kind": kind,
+            "service": service,
+            "command": command,
+            "start": time.time(),
+            "ok": False,
+            "exit_code": None,
+            "output_bytes": 0,
+        }
+        # Records opened on this thread while another is open (compose runs
+        # inside an operation) add their output to the enclosing record.
+        stack = self._local.__dict__.setdefault("stack", [])
+        parent = stack[-1] if stack else None
+        stack.append(entry)
+        try:
+            yield entry
+        finally:
+            stack.pop()
+            entry["end"] = time.time()
+            if entry["exit_code"] is None:
+                entry["exit_code"] = 0 if entry["ok"] else 1
+            if parent is not None:
+                parent["output_bytes"] += entry["output_bytes"]
+            self.append(entry)
+
+    def append(self, entry):
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+        with self._lock:
+            try:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                # Other dockerlab processes append to the same journal; the
+                # size check, rotation and append must happen as one step.
+                with open(self.lock_path(), "a") as lock:
+                    fcntl.flock(lock, fcntl.LOCK_EX)
+                    if self.path.exists() and self.path.stat().st_size \
+                            + len(line) > self.max_bytes:
+                        self.rotate()
+                    with open(self.path, "a") as f:
+                        f.write(line)
+            except OSError as e:
+                print(f"Failed to write operation journal: {e}")
+
+    def rotate(self):
+        for index in range(self.backup_count - 1, 0, -1):
+            source = self.backup_path(index)
+            if source.exists():
+                os.replace(source, self.backup_path(index + 1))
+        if self.backup_count > 0:
+            os.replace(self.path, self.backup_path(1))
+        else:
+            os.unlink(self.path)
+
+    def lock_path(self):
+        return self.path.with_name(f"{self.path.name}.lock")
+
+    def backup_path(self, index):
+        return self.path.with_name(f"{self.path.name}.{index}")
+
+    def files(self):
+        paths = [self.backup_path(index)
+                 for index in range(self.backup_count, 0, -1)]
+        paths.append(self.path)
+        return [path for path in paths if path.exists()]
+
+    def iter_records(self):
+        for path in self.files():
+            with open(path, "r") as f:
+                for line in f:
+                    try:
+                        yield json.loads(line)
+                    except ValueError:
+                        continue
+
+
+class LatencyHistogram:
+    # Log-scale buckets keep memory constant however many samples are added;
+    # each bucket spans 5%, which bounds the percentile error.
+    GROWTH = 1.05
+    MIN_SECONDS = 0.001
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.failures = 0
+        self.max = 0.0
+
+    def add(self, seconds, ok=True):
+        seconds = max(seconds, self.MIN_SECONDS)
+        index = int(math.log(seconds / self.MIN_SECONDS, self.GROWTH))
+        self.buckets[index] = self.buckets.get(index, 0) + 1
+        self.count += 1
+        self.max = max(self.max, seconds)
+        if not ok:
+            self.failures += 1
+
+    def percentile(self, percent):
+        if not self.count:
+            return None
+        rank = math.ceil(self.count * percent / 100)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                upper = self.MIN_SECONDS * self.GROWTH ** (index + 1)
+                return min(upper, self.max)
+        return self.max
+
+
+PERIODS = {"hour": 3600, "day": 86400, "week": 7 * 86400}
+
+
+def summarize_journal(records, period=None, since=None, service=None,
+                      command=None, kind=None):
+    summary = {}
+    trends = {}
+    period_seconds = PERIODS[period] if period else None
+    for entry in records:
+        if "end" not in entry or "start" not in entry:
+            continue
+        if since is not None and entry["start"] < since:
+            continue
+        if service is not None and entry.get("service") != service:
+            continue
+        if command is not None and entry.get("command") != command:
+            continue
+        if kind is not None and entry.get("kind") != kind:
+            continue
+
+        key = (entry.get("kind"), entry.get("service"), entry.get("command"))
+        duration = entry["end"] - entry["start"]
+        ok = entry.get("ok", False)
+        summary.setdefault(key, LatencyHistogram()).add(duration, ok)
+        if period_seconds:
+            bucket = int(entry["start"] // period_seconds * period_seconds)
+            trends.setdefault(key, {}).setdefault(
+                bucket, LatencyHistogram()).add(duration, ok)
+    return summary, trends
@@ -0,0 +1,112 @@
+import fcntl
+import json
+import os
+import re
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from .utils import write_json_atomic
+
+
+def lease_name(key):
+    return re.sub(r"[^A-Za-z0-9_.-]", "_", key)
+
+
+class OperationCoordinator:
+    def __init__(self, lease_dir, namespace=None, status_max_age=5):
+        self.lease_dir = Path(lease_dir)
+        self.namespace = namespace
+        self.status_max_age = status_max_age
+
+    @classmethod
+    def from_config(cls, config):
+        return cls(
+            config.get_state_dir() / "leases",
+            namespace=config.get_config_id(),
+            status_max_age=config.get_defaults().get("status_cache_seconds", 5),
+        )
+
+    def _open(self, path):
+        try:
+            self.lease_dir.mkdir(parents=True, exist_ok=True)
+            return open(path, "a+")
+        except OSError as e:
+            print(f"Failed to open lease {path}, running uncoordinated: {e}")
+            return None
+
+    def _try_lock(self, f):
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except BlockingIOError:
+            return False
+
+    @contextmanager
+    def service_lock(self, service_name):
+        # Not namespaced: two configs may point at the same compose project.
+        f = self._open(self.lease_dir / f"service.{lease_name(service_name)}.lock")
+        if f is None:
+            yield
+            return
+        with f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _key_name(self, key):
+        return lease_name(f"{self.namespace}.{key}" if self.namespace else key)
+
+    def result_path(self, key):
+        return self.lease_dir / f"{self._key_name(key)}.result.json"
+
+    def read_result(self, key):
+        try:
+            with open(self.result_path(key), "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def write_result(self, key, value):
+        path = self.result_path(key)
+        try:
+            write_json_atomic(path, {"finished": time.time(), "value": value})
+        except OSError as e:
+            print(f"Failed to write lease result {path}: {e}")
+
+    def invalidate(self, key):
+        try:
+            os.unlink(self.result_path(key))
+        except OSError:
+            pass
+
+    def coalesce(self, key, operation, max_age=None):
+        # A result that finished within max_age is reused without locking.
+        if max_age:
+            cached = self.read_result(key)
+            if cached and time.time() - cached["finished"] <= max_age:
+                return cached["value"]
+
+        f = self._open(self.lease_dir / f"{self._key_name(key)}.lock")
+        if f is None:
+            return operation()
+
+        with f:
+            requested = time.time()
+            if not self._try_lock(f):
+                # Someone else holds the lease; wait for it rather than
+                # running again. If it finished after we asked, its result
+                # answers our request too.
+                fcntl.flock(f, fcntl.LOCK_EX)
+                result = self.read_result(key)
+                if result and result["finished"] >= requested:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+                    return result["value"]
+            try:
+                value = operation()
+                self.write_result(key, value)
+                return value
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
@@ -0,0 +1,267 @@
+import gzip
+import json
+import re
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+
+from .utils import parallel_operations, run_periodically, write_json_atomic
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9_]{2,}")
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 7 * 86400}
+
+
+def tokenize(text):
+    return set(TOKEN_PATTERN.findall(text.lower()))
+
+
+def term_tokens(term):
+    # A search term is matched as a substring, so a word touching either
+    # end of the term may be a fragment of a longer word in the log line.
+    term = term.lower()
+    tokens = []
+    for match in TOKEN_PATTERN.finditer(term):
+        open_start = match.start() == 0
+        open_end = match.end() == len(term)
+        if open_start and open_end:
+            tokens.append((match.group(), "contains"))
+        elif open_start:
+            tokens.append((match.group(), "endswith"))
+        elif open_end:
+            tokens.append((match.group(), "startswith"))
+        else:
+            tokens.append((match.group(), "exact"))
+    return tokens
+
+
+def indexed_services(token_index, token, kind):
+    if kind == "exact":
+        return set(token_index.get(token, []))
+    services = set()
+    for word, word_services in token_index.items():
+        if token in word if kind == "contains" else getattr(word, kind)(token):
+            services.update(word_services)
+    return services
+
+
+def parse_duration(value):
+    match = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([smhdw]?)\s*", str(value))
+    if not match:
+        raise ValueError(f"Invalid duration: {value}")
+    return float(match.group(1)) * DURATION_UNITS[match.group(2) or "s"]
+
+
+def parse_docker_timestamp(timestamp):
+    # Docker prints RFC 3339 with nanoseconds; datetime only takes micros.
+    match = re.match(
+        r"(\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d)(?:\.(\d+))?(Z|[+-]\d\d:\d\d)",
+        timestamp)
+    if not match:
+        return None
+    offset = "+00:00" if match.group(3) == "Z" else match.group(3)
+    fraction = (match.group(2) or "0")[:6].ljust(6, "0")
+    return datetime.fromisoformat(
+        f"{match.group(1)}.{fraction}{offset}").timestamp()
+
+
+class LogArchive:
+    def __init__(self, root, partition_seconds=3600, max_bytes=None,
+                 max_age=None):
+        self.root = Path(root)
+        self.partition_seconds = partition_seconds
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config):
+        defaults = config.get_defaults()
+        return cls(
+            config.get_state_dir() / "logs",
+            partition_seconds=defaults.get("log_partition_seconds", 3600),
+            max_bytes=defaults.get("log_archive_max_bytes", 1024 ** 3),
+            max_age=defaults.get("log_archive_max_age", 7 * 86400),
+        )
+
+    def partition_start(self, timestamp):
+        return int(timestamp // self.partition_seconds * self.partition_seconds)
+
+    def partitions(self):
+        if not self.root.exists():
+            return []
+        return sorted(
+            (int(path.name), path) for path in self.root.iterdir()
+            if path.is_dir() and path.name.isdigit())
+
+    def load_index(self, partition):
+        try:
+            with open(partition / "index.json", "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"services": {}, "tokens": {}}
+
+    def save_index(self, partition, index):
+        write_json_atomic(partition / "index.json", index,
+                          separators=(",", ":"))
+
+    def append(self, service_name, entries):
+        by_partition = {}
+        for timestamp, line in entries:
+            by_partition.setdefault(
+                self.partition_start(timestamp), []).append((timestamp, line))
+
+        with self._lock:
+            for start, partition_entries in by_partition.items():
+                partition = self.root / str(start)
+                partition.mkdir(parents=True, exist_ok=True)
+                # gzip members can be concatenated, so each collection run
+                # appends a new member instead of rewriting the segment.
+                with gzip.open(partition / f"{service_name}.log.gz", "at") as f:
+                    for timestamp, line in partition_entries:
+                        f.write(f"{timestamp:.6f} {line}\n")
+
+                index = self.load_index(partition)
+                service_index = index["services"].setdefault(
+                    service_name, {"start": None, "end": None, "lines": 0})
+                timestamps = [timestamp for timestamp, _ in partition_entries]
+                service_index["start"] = min(
+                    [t for t in [service_index["start"]] if t is not None]
+                    + timestamps)
+                service_index["end"] = max(
+                    [t for t in [service_index["end"]] if t is not None]
+                    + timestamps)
+                service_index["lines"] += len(partition_entries)
+
+                tokens = set()
+                for _, line in partition_entries:
+                    tokens.update(tokenize(line))
+                for token in tokens:
+                    services = index["tokens"].setdefault(token, [])
+                    if service_name not in services:
+                        services.append(service_name)
+                self.save_index(partition, index)
+
+    def search(self, term, since=None, services=None):
+        term_lower = term.lower()
+        tokens = term_tokens(term)
+        for start, partition in self.partitions():
+            if since is not None and start + self.partition_seconds < since:
+                continue
+            index = self.load_index(partition)
+            candidates = set(index["services"])
+            if services:
+                candidates &= set(services)
+            for token, kind in tokens:
+                candidates &= indexed_services(index["tokens"], token, kind)
+            matches = []
+            for service_name in sorted(candidates):
+                if since is not None and \
+                        index["services"][service_name]["end"] < since:
+                    continue
+                path = partition / f"{service_name}.log.gz"
+                with gzip.open(path, "rt") as f:
+                    for record in f:
+                        timestamp, _, line = record.rstrip("\n").partition(" ")
+                        if since is not None and float(timestamp) < since:
+                            continue
+                        if term_lower in line.lower():
+                            matches.append((float(timestamp), service_name, line))
+            yield from sorted(matches)
+
+    def size(self):
+        return sum(path.stat().st_size
+                   for path in self.root.rglob("*") if path.is_file())
+
+    def enforce_retention(self, now=None):
+        now = now if now is not None else time.time()
+        removed = []
+        with self._lock:
+            partitions = self.partitions()
+            while partitions:
+                start, partition = partitions[0]
+                expired = self.max_age is not None and \
+                    start + self.partition_seconds < now - self.max_age
+                oversized = self.max_bytes is not None and \
+                    self.size() > self.max_bytes and len(partitions) > 1
+                if not expired and not oversized:
+                    break
+                shutil.rmtree(partition)
+                removed.append(start)
+                partitions.pop(0)
+        return removed
+
+
+class LogCollector:
+    def __init__(self, config, archive, docker_utils, max_workers=None):
+        self.config = config
+        self.archive = archive
+        self.docker_utils = docker_utils
+        self.max_workers = max_workers or parallel_operations(config)
+        self.cursor_path = archive.root / "cursors.json"
+        self._lock = threading.Lock()
+
+    def load_cursors(self):
+        try:
+            with open(self.cursor_path, "r") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def save_cursors(self, cursors):
+        write_json_atomic(self.cursor_path, cursors, indent=2)
+
+    def collect(self, service_names=None):
+        services = [
+            service["name"] for service in self.config.get_services()
+            if service_names is None or service["name"] in service_names
+        ]
+        cursors = self.load_cursors()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            counts = dict(zip(services, executor.map(
+                lambda name: self.collect_service(name, cursors.get(name)),
+                services)))
+        self.archive.enforce_retention()
+        return counts
+
+    def collect_service(self, service_name, cursor):
+        output = self.docker_utils.container_logs(service_name, since=cursor)
+        if not output:
+            return 0
+
+        entries = []
+        latest = cursor
+        for raw_line in output.splitlines():
+            timestamp_text, _, line = raw_line.partition(" ")
+            timestamp = parse_docker_timestamp(timestamp_text)
+            if timestamp is None:
+                continue
+            # --since is inclusive, so skip what the last run already stored.
+            if cursor is not None and timestamp <= cursor:
+                continue
+            entries.append((timestamp, line))
+            latest = timestamp if latest is None else max(latest, timestamp)
+
+        entries.sort(key=lambda entry: entry[0])
+        if entries:
+            self.archive.append(service_name, entries)
+        self._advance(service_name, latest)
+        return len(entries)
+
+    def _advance(self, service_name, latest):
+        if latest is None:
+            return
+        with self._lock:
+            cursors = self.load_cursors()
+            cursors[service_name] = latest
+            self.save_cursors(cursors)
+
+    def run_forever(self, interval, stop_event=None):
+        run_periodically(self.collect, interval, stop_event)
+
+
+def format_timestamp(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime(
+        "%Y-%m-%dT%H:%M:%S.%fZ")
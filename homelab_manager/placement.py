@@ -0,0 +1,292 @@
+import json
+import re
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+from .remote_sync import HostShell
+from .utils import parallel_operations
+
+MEMORY_UNITS = {"": 1, "b": 1, "k": 1024, "m": 1024 ** 2, "g": 1024 ** 3,
+                "t": 1024 ** 4}
+RESOURCES = ("cpus", "memory", "disk")
+
+
+def parse_memory(value):
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return int(value)
+    match = re.fullmatch(
+        r"\s*([\d.]+)\s*([bkmgt]?)(?:i?b)?\s*", str(value).lower())
+    if not match:
+        raise ValueError(f"Invalid size: {value}")
+    return int(float(match.group(1)) * MEMORY_UNITS[match.group(2)])
+
+
+def parse_cpus(value):
+    return None if value is None else float(value)
+
+
+class PlacementEngine:
+    def __init__(self, config, compose_handler, shell=None, max_workers=None):
+        self.config = config
+        self.compose_handler = compose_handler
+        self.shell = shell or HostShell()
+        defaults = config.get_defaults()
+        self.max_workers = max_workers or parallel_operations(config)
+        self.default_cpus = defaults.get("placement_default_cpus", 0.1)
+        self.default_memory = parse_memory(
+            defaults.get("placement_default_memory", "128m"))
+
+    def candidate_hosts(self):
+        hosts = list(self.config.get_hosts())
+        if hosts:
+            return hosts
+        hosts = ["local"]
+        for service in self.config.get_services():
+            host = self.config.get_service_host(service)
+            if service.get("host") != "auto" and host not in hosts:
+                hosts.append(host)
+        return hosts
+
+    def host_inventory(self, hosts=None):
+        hosts = hosts or self.candidate_hosts()
+        configured = self.config.get_hosts()
+        inventory = {}
+        to_gather = []
+        for host in hosts:
+            entry = configured.get(host, {})
+            inventory[host] = {
+                "cpus": parse_cpus(entry.get("cpus")),
+                "memory": parse_memory(entry.get("memory")),
+                "disk": parse_memory(entry.get("disk")),
+            }
+            if any(inventory[host][r] is None for r in RESOURCES):
+                to_gather.append(host)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            gathered = dict(zip(to_gather, executor.map(
+                self.gather_capacity, to_gather)))
+        for host, capacity in gathered.items():
+            for resource in RESOURCES:
+                if inventory[host][resource] is None:
+                    inventory[host][resource] = capacity.get(resource)
+        return inventory
+
+    def gather_capacity(self, host):
+        command = ("docker info --format '{{.NCPU}} {{.MemTotal}}' && "
+                   "df -Pk \"$(docker info --format '{{.DockerRootDir}}')\" "
+                   "| tail -1")
+        try:
+            output = self.shell.run(
+                self.config.get_host_settings(host), command)
+        except subprocess.CalledProcessError as e:
+            print(f"Failed to read capacity of {host}: {e}")
+            return {}
+        lines = output.strip().splitlines()
+        try:
+            cpus, memory = lines[0].split()
+            # Total size, like NCPU and MemTotal: pinned services' disk is
+            # reserved against it, so free space would count usage twice.
+            size_kb = lines[1].split()[1]
+            return {"cpus": float(cpus), "memory": int(memory),
+                    "disk": int(size_kb) * 1024}
+        except (IndexError, ValueError):
+            print(f"Unexpected capacity output from {host}: {output!r}")
+            return {}
+
+    def observe_usage(self, hosts=None):
+        hosts = hosts or self.candidate_hosts()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            outputs = list(executor.map(self._docker_stats, hosts))
+
+        usage = {}
+        for output in outputs:
+            for line in output.splitlines():
+                try:
+                    stats = json.loads(line)
+                    cpus = float(stats["CPUPerc"].rstrip("%")) / 100
+                    memory = parse_memory(stats["MemUsage"].split("/")[0])
+                except (ValueError, KeyError):
+                    continue
+                usage[stats.get("Name")] = {"cpus": cpus, "memory": memory}
+        return usage
+
+    def _docker_stats(self, host):
+        try:
+            return self.shell.run(
+                self.config.get_host_settings(host),
+                "docker stats --no-stream --format '{{json .}}'")
+        except subprocess.CalledProcessError as e:
+            print(f"Failed to read container stats on {host}: {e}")
+            return ""
+
+    def service_requirements(self, service, observed=None):
+        configured = service.get("resources", {})
+        cpus = memory = None
+        compose = self.compose_handler.load_compose(service["name"]) or {}
+        definitions = [d or {} for d in
+                       (compose.get("services") or {}).values()]
+        for definition in definitions:
+            resources = (definition.get("deploy") or {}).get("resources") or {}
+            reservations = resources.get("reservations") or {}
+            limits = resources.get("limits") or {}
+            container_cpus = parse_cpus(
+                reservations.get("cpus", limits.get("cpus", definition.get("cpus"))))
+            container_memory = parse_memory(
+                reservations.get("memory", limits.get(
+                    "memory", definition.get(
+                        "mem_reservation", definition.get("mem_limit")))))
+            if container_cpus is not None:
+                cpus = (cpus or 0) + container_cpus
+            if container_memory is not None:
+                memory = (memory or 0) + container_memory
+
+        observed = (observed or {}).get(service["name"], {})
+        count = max(len(definitions), 1)
+        if cpus is None:
+            cpus = observed.get("cpus", self.default_cpus * count)
+        if memory is None:
+            memory = observed.get("memory", self.default_memory * count)
+        return {
+            "cpus": parse_cpus(configured.get("cpus", cpus)),
+            "memory": parse_memory(configured.get("memory", memory)),
+            "disk": parse_memory(configured.get("disk", 0)),
+        }
+
+    def placement_units(self, auto_services, pinned_hosts):
+        parent = {name: name for name in auto_services}
+
+        def find(name):
+            while parent[name] != name:
+                parent[name] = parent[parent[name]]
+                name = parent[name]
+            return name
+
+        pins = {}
+        for name, service in auto_services.items():
+            hints = list(service.get("colocate_with", []))
+            if service.get("colocate"):
+                hints += self.config.get_service_dependencies(name)
+            for other in hints:
+                if other in parent:
+                    parent[find(name)] = find(other)
+                elif other in pinned_hosts:
+                    pins[name] = pinned_hosts[other]
+
+        units = {}
+        for name in auto_services:
+            units.setdefault(find(name), []).append(name)
+        result = []
+        for members in units.values():
+            unit_pins = {pins[name] for name in members if name in pins}
+            result.append((members, unit_pins))
+        return result
+
+    def plan(self, inventory, observed=None, strategy="spread"):
+        hosts = {
+            host: {"capacity": dict(capacity),
+                   "used": {resource: 0 for resource in RESOURCES},
+                   "groups": set()}
+            for host, capacity in inventory.items()
+        }
+        auto_services = {}
+        pinned_hosts = {}
+        requirements = {}
+        for service in self.config.get_enabled_services():
+            requirements[service["name"]] = self.service_requirements(
+                service, observed)
+            if service.get("host") == "auto":
+                auto_services[service["name"]] = service
+                continue
+            host = self.config.get_service_host(service)
+            pinned_hosts[service["name"]] = host
+            if host in hosts:
+                self._reserve(hosts[host], requirements[service["name"]],
+                              service.get("anti_affinity"))
+
+        units = []
+        for members, pins in self.placement_units(auto_services, pinned_hosts):
+            need = {resource: sum(requirements[name][resource] or 0
+                                  for name in members)
+                    for resource in RESOURCES}
+            groups = {auto_services[name]["anti_affinity"] for name in members
+                      if auto_services[name].get("anti_affinity")}
+            units.append((members, pins, need, groups))
+
+        # Largest units first; ties broken by name so plans are stable.
+        units.sort(key=lambda unit: (
+            -self._dominant_share(unit[2], inventory), sorted(unit[0])))
+
+        assignments = {}
+        unplaced = []
+        for members, pins, need, groups in units:
+            candidates = [host for host in hosts if not pins or host in pins]
+            best = None
+            for host in candidates:
+                state = hosts[host]
+                if len(pins) > 1 or state["groups"] & groups or \
+                        not self._fits(state, need):
+                    continue
+                score = self._utilization(state, need)
+                if best is None or (score < best[0] if strategy == "spread"
+                                    else score > best[0]):
+                    best = (score, host)
+            if best is None:
+                unplaced.extend(sorted(members))
+                continue
+            self._reserve(hosts[best[1]], need, None)
+            hosts[best[1]]["groups"].update(groups)
+            for name in members:
+                assignments[name] = best[1]
+
+        return {
+            "assignments": assignments,
+            "unplaced": unplaced,
+            "hosts": {host: {"capacity": state["capacity"],
+                             "used": state["used"]}
+                      for host, state in hosts.items()},
+        }
+
+    def _reserve(self, state, need, group):
+        for resource in RESOURCES:
+            state["used"][resource] += need[resource] or 0
+        if group:
+            state["groups"].add(group)
+
+    def _fits(self, state, need):
+        for resource in RESOURCES:
+            capacity = state["capacity"].get(resource)
+            if capacity is not None and \
+                    state["used"][resource] + (need[resource] or 0) > capacity:
+                return False
+        return True
+
+    def _utilization(self, state, need):
+        shares = [
+            (state["used"][resource] + (need[resource] or 0)) / capacity
+            for resource in RESOURCES
+            if (capacity := state["capacity"].get(resource))
+        ]
+        return max(shares, default=0)
+
+    def _dominant_share(self, need, inventory):
+        shares = []
+        for resource in RESOURCES:
+            total = sum(capacity.get(resource) or 0
+                        for capacity in inventory.values())
+            if total:
+                shares.append((need[resource] or 0) / total)
+        return max(shares, default=0)
+
+    def apply(self, plan):
+        changed = 0
+        for service in self.config.get_services():
+            host = plan["assignments"].get(service["name"])
+            if host and service.get("host") == "auto" and \
+                    service.get("placed_host") != host:
+                service["placed_host"] = host
+                changed += 1
+        if changed:
+            self.config.save_config()
+        return changed
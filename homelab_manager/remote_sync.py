@@ -0,0 +1,258 @@
+import hashlib
+import io
+import json
+import os
+import posixpath
+import shlex
+import subprocess
+import tarfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from .utils import parallel_operations
+
+MANIFEST_NAME = "manifest.json"
+SYNC_DIR = ".sync"
+
+
+def file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(65536), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class SshTransport:
+    def command(self, settings, remote_command):
+        command = ["ssh", "-o", "BatchMode=yes", "-p", str(settings["port"])]
+        if settings.get("key"):
+            command += ["-i", os.path.expanduser(settings["key"])]
+        target = settings["host"]
+        if settings.get("user"):
+            target = f"{settings['user']}@{target}"
+        return command + [target, remote_command]
+
+    def run(self, settings, remote_command, input=None):
+        return subprocess.run(
+            self.command(settings, remote_command),
+            input=input,
+            check=True,
+            capture_output=True,
+        )
+
+
+class LocalTransport:
+    def run(self, settings, command, input=None):
+        return subprocess.run(
+            ["sh", "-c", command],
+            input=input,
+            check=True,
+            capture_output=True,
+        )
+
+
+class HostShell:
+    def __init__(self, transport=None, local_transport=None):
+        self.transport = transport or SshTransport()
+        self.local_transport = local_transport or LocalTransport()
+
+    def run(self, settings, command):
+        transport = self.local_transport if settings["host"] == "local" \
+            else self.transport
+        output = transport.run(settings, command).stdout
+        return output.decode() if isinstance(output, bytes) else output
+
+
+class RemoteSync:
+    def __init__(self, config, compose_handler, transport=None,
+                 max_workers=None):
+        self.config = config
+        self.compose_handler = compose_handler
+        self.transport = transport or SshTransport()
+        defaults = config.get_defaults()
+        self.max_workers = max_workers or parallel_operations(config)
+        self.remote_root = defaults.get("remote_root", ".dockerlab")
+
+    def remote_dir(self, service):
+        return service.get(
+            "remote_dir", posixpath.join(self.remote_root, service["name"]))
+
+    def local_files(self, service):
+        files = {}
+        compose_file = self.compose_handler.get_compose_file(service["name"])
+        if compose_file:
+            files["docker-compose.yml"] = compose_file
+        env_file = service.get("env_file")
+        if env_file:
+            path = Path(env_file).expanduser()
+            if not path.is_absolute():
+                path = self.compose_handler.base_dir / path
+            files[path.name] = str(path)
+        return files
+
+    def sync(self, service_names=None):
+        hosts = {}
+        for service in self.config.get_services():
+            if service_names is not None and service["name"] not in service_names:
+                continue
+            if not self.config.is_remote_service(service):
+                continue
+            settings = self.config.get_ssh_settings(service)
+            key = (settings["host"], settings["user"],
+                   settings["port"], settings["key"])
+            hosts.setdefault(key, (settings, []))[1].append(service)
+
+        results = {}
+        if not hosts:
+            return results
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [executor.submit(self.sync_host, settings, services)
+                       for settings, services in hosts.values()]
+            for future in futures:
+                results.update(future.result())
+        return results
+
+    def manifest_path(self, service):
+        return posixpath.join(
+            self.remote_dir(service), SYNC_DIR, "current", MANIFEST_NAME)
+
+    def fetch_manifests(self, settings, services):
+        # One output line per service: its manifest, or empty if never synced.
+        command = "; ".join(
+            f"cat {shlex.quote(self.manifest_path(service))} 2>/dev/null; echo"
+            for service in services)
+        output = self.transport.run(settings, command).stdout or b""
+        if isinstance(output, bytes):
+            output = output.decode(errors="replace")
+        manifests = {}
+        for service, line in zip(services, output.split("\n")):
+            try:
+                manifests[service["name"]] = json.loads(line) if line else {}
+            except ValueError:
+                manifests[service["name"]] = {}
+        return manifests
+
+    def sync_host(self, settings, services):
+        host = settings["host"]
+        try:
+            manifests = self.fetch_manifests(settings, services)
+        except subprocess.CalledProcessError as e:
+            print(f"Failed to read sync manifests from {host}: {e.stderr}")
+            return {service["name"]: "failed" for service in services}
+
+        results = {}
+        changes = {}
+        for service in services:
+            name = service["name"]
+            files = self.local_files(service)
+            try:
+                digests = {remote_name: file_digest(path)
+                           for remote_name, path in files.items()}
+            except OSError as e:
+                print(f"Failed to read files for {name}: {e}")
+                results[name] = "failed"
+                continue
+
+            previous = manifests.get(name, {}).get("files", {})
+            changed = {
+                remote_name: files[remote_name]
+                for remote_name, digest in digests.items()
+                if previous.get(remote_name) != digest
+            }
+            if changed:
+                changes[name] = (self.remote_dir(service), digests, changed)
+            else:
+                results[name] = "unchanged"
+
+        if not changes:
+            return results
+
+        payload = self.build_archive(changes)
+        try:
+            result = self.transport.run(
+                settings,
+                "sh -c " + shlex.quote(self.apply_script(changes)),
+                input=payload)
+        except subprocess.CalledProcessError as e:
+            print(f"Failed to sync files to {host}: {e.stderr}")
+            results.update({name: "failed" for name in changes})
+            return results
+
+        output = result.stdout or b""
+        if isinstance(output, bytes):
+            output = output.decode(errors="replace")
+        synced = {line.split(" ", 1)[1] for line in output.splitlines()
+                  if line.startswith("synced ")}
+        for name in changes:
+            if name in synced:
+                results[name] = "synced"
+            else:
+                print(f"Failed to sync files for {name} to {host}: "
+                      f"{result.stderr}")
+                results[name] = "failed"
+        return results
+
+    def build_archive(self, changes):
+        buffer = io.BytesIO()
+        with tarfile.open(fileobj=buffer, mode="w") as archive:
+            for name, (_, digests, changed) in changes.items():
+                for remote_name, path in changed.items():
+                    archive.add(path, arcname=f"{name}/{remote_name}")
+                data = json.dumps({"files": digests}).encode()
+                info = tarfile.TarInfo(f"{name}/{MANIFEST_NAME}")
+                info.size = len(data)
+                archive.addfile(info, io.BytesIO(data))
+        return buffer.getvalue()
+
+    def apply_script(self, changes):
+        # Each service's files live in <remote_dir>/.sync/<version>, and the
+        # synced names in <remote_dir> are symlinks through .sync/current.
+        # A new version is assembled next to the live one and switched in
+        # with a single rename of the current link, so a service sees either
+        # all old or all new files. Services run in separate subshells, and
+        # one that fails keeps its old version and manifest.
+        root = shlex.quote(self.remote_root)
+        lines = [
+            "set -e",
+            f"mkdir -p {root}",
+            f"stage=$(mktemp -d {root}/.staging.XXXXXX)",
+            "trap 'rm -rf \"$stage\"' EXIT",
+            'tar -xf - -C "$stage"',
+            "set +e",
+        ]
+        for name, (remote_dir, digests, changed) in changes.items():
+            block = [
+                f"dir={shlex.quote(remote_dir)}",
+                f'mkdir -p "$dir"/{SYNC_DIR}',
+                f'new=$(mktemp -d "$dir"/{SYNC_DIR}/v.XXXXXX)',
+            ]
+            for remote_name in digests:
+                target = shlex.quote(remote_name)
+                if remote_name in changed:
+                    source = shlex.quote(f"{name}/{remote_name}")
+                    block.append(f'mv "$stage"/{source} "$new"/{target}')
+                else:
+                    block.append(f'cp -p "$dir"/{target} "$new"/{target}')
+            block += [
+                f'mv "$stage"/{shlex.quote(name)}/{MANIFEST_NAME} "$new"/',
+                f'ln -sfn "${{new##*/}}" "$dir"/{SYNC_DIR}/current.tmp',
+                f'mv -fT "$dir"/{SYNC_DIR}/current.tmp "$dir"/{SYNC_DIR}/current',
+            ]
+            for remote_name in digests:
+                target = shlex.quote(remote_name)
+                link = shlex.quote(f"{SYNC_DIR}/current/{remote_name}")
+                block.append(
+                    f'{{ [ -L "$dir"/{target} ] || {{ '
+                    f'ln -sfn {link} "$dir"/{SYNC_DIR}/link.tmp && '
+                    f'mv -fT "$dir"/{SYNC_DIR}/link.tmp "$dir"/{target}; }}; }}')
+            block.append(
+                f'for old in "$dir"/{SYNC_DIR}/v.*; do '
+                '[ "$old" = "$new" ] || rm -rf "$old"; done')
+            # set -e is ignored inside a list tested with &&, so every step
+            # is chained explicitly.
+            lines.append("(\n" + " &&\n".join(block) + "\n)"
+                         f" && echo synced {shlex.quote(name)}")
+        # Per-service outcomes are reported by the "synced" lines.
+        lines.append("exit 0")
+        return "\n".join(lines)
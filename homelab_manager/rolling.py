@@ -0,0 +1,150 @@
+import math
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+
+def resolve_wave_size(wave_size, total):
+    wave_size = str(wave_size).strip()
+    if wave_size.endswith("%"):
+        size = math.ceil(total * float(wave_size[:-1]) / 100)
+    else:
+        size = int(wave_size)
+    return max(1, size)
+
+
+def dependency_levels(config, service_names):
+    selected = set(service_names)
+    remaining = {
+        name: {dep for dep in config.get_service_dependencies(name)
+               if dep in selected}
+        for name in service_names
+    }
+    levels = []
+    done = set()
+    while remaining:
+        level = [name for name in service_names
+                 if name in remaining and remaining[name] <= done]
+        if not level:
+            raise ValueError(
+                "Dependency cycle between services: "
+                + ", ".join(sorted(remaining)))
+        for name in level:
+            del remaining[name]
+        done.update(level)
+        levels.append(level)
+    return levels
+
+
+class RollingExecutor:
+    HEALTHY = "Running (Healthy)"
+
+    def __init__(self, manager, wave_size=1, max_failure_rate=0.0,
+                 rollback=False, require_healthy=True, health_timeout=120,
+                 poll_interval=5):
+        self.manager = manager
+        self.wave_size = wave_size
+        self.max_failure_rate = max_failure_rate
+        self.rollback = rollback
+        self.require_healthy = require_healthy
+        self.health_timeout = health_timeout
+        self.poll_interval = poll_interval
+
+    def plan_waves(self, service_names):
+        size = resolve_wave_size(self.wave_size, len(service_names))
+        waves = []
+        # Waves never mix dependency levels, so every dependent starts
+        # after the wave that contains its dependencies is healthy.
+        for level in dependency_levels(self.manager.config, service_names):
+            for index in range(0, len(level), size):
+                waves.append(level[index:index + size])
+        return waves
+
+    def run(self, operation, service_names):
+        waves = self.plan_waves(service_names)
+        report = {"operation": operation, "waves": [],
+                  "aborted": False, "rolled_back": []}
+        snapshots = {}
+        processed = []
+
+        for number, wave in enumerate(waves, start=1):
+            started = time.monotonic()
+            if operation == "update" and self.rollback:
+                for name in wave:
+                    snapshots[name] = self.manager.snapshot_images(name)
+
+            with ThreadPoolExecutor(max_workers=len(wave)) as executor:
+                results = dict(zip(wave, executor.map(
+                    lambda name: self.apply(operation, name), wave)))
+            applied = time.monotonic()
+
+            failed = [name for name, ok in results.items() if not ok]
+            failed += self.wait_for_health(
+                [name for name, ok in results.items() if ok])
+            processed.extend(wave)
+
+            wave_report = {
+                "wave": number,
+                "services": wave,
+                "failed": failed,
+                "apply_seconds": applied - started,
+                "health_seconds": time.monotonic() - applied,
+                "seconds": time.monotonic() - started,
+            }
+            report["waves"].append(wave_report)
+            print(f"Wave {number}/{len(waves)}: {len(wave) - len(failed)}/"
+                  f"{len(wave)} succeeded in {wave_report['seconds']:.1f}s")
+
+            if len(failed) / len(wave) > self.max_failure_rate:
+                print(f"Wave {number} failure rate exceeded "
+                      f"{self.max_failure_rate:.0%}; stopping.")
+                report["aborted"] = True
+                if operation == "update" and self.rollback:
+                    report["rolled_back"] = self.roll_back(
+                        processed, snapshots)
+                break
+        return report
+
+    def apply(self, operation, service_name):
+        if operation == "restart":
+            return self.manager.restart_service(service_name)
+        if operation == "update":
+            return self.manager.update_service(service_name)
+        raise ValueError(f"Unsupported rolling operation: {operation}")
+
+    def is_ready(self, name, status, health_sources):
+        if not status.startswith("Running"):
+            return False
+        if not self.require_healthy or status == self.HEALTHY:
+            return True
+        # A service with no probes and no HEALTHCHECK can never report
+        # healthy, so running is all it can show.
+        if name not in health_sources:
+            health_sources[name] = self.manager.has_health_source(name)
+        return not health_sources[name]
+
+    def wait_for_health(self, service_names):
+        pending = set(service_names)
+        health_sources = {}
+        deadline = time.monotonic() + self.health_timeout
+        while pending:
+            # One probe sweep per poll covers every pending service.
+            probe_results = self.manager.run_probes(
+                [{"name": name} for name in sorted(pending)])
+            for name in list(pending):
+                status = self.manager.service_status(name, probe_results)
+                if self.is_ready(name, status, health_sources):
+                    pending.discard(name)
+            if not pending or time.monotonic() >= deadline:
+                break
+            time.sleep(self.poll_interval)
+        for name in sorted(pending):
+            print(f"Service {name} did not become healthy within "
+                  f"{self.health_timeout}s.")
+        return sorted(pending)
+
+    def roll_back(self, service_names, snapshots):
+        rolled_back = []
+        for name in reversed(service_names):
+            if self.manager.rollback_service(name, snapshots.get(name, {})):
+                rolled_back.append(name)
+        return rolled_back
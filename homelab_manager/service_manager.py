@@ -1,14 +1,55 @@
+from .checkpoint import DONE, FAILED, IN_FLIGHT, PENDING, BulkCheckpoint
 from .compose_file_handler import ComposeFileHandler
 from .docker_utils import DockerUtils
+from .health_probes import ProbeEngine
+from .journal import OperationJournal
+from .locking import OperationCoordinator
+from .remote_sync import RemoteSync
 
 
 class ServiceManager:
     def __init__(self, config):
         self.config = config
+        self.last_run_id = None
+        self.journal = OperationJournal.from_config(config)
+        self.coordinator = OperationCoordinator.from_config(config)
         self.docker_utils = DockerUtils()
-        self.compose_handler = ComposeFileHandler(config)
+        self.compose_handler = ComposeFileHandler(config, self.journal)
+        self.remote_sync = RemoteSync(config, self.compose_handler)
+        defaults = config.get_defaults()
+        self.probe_engine = ProbeEngine(
+            max_concurrency=defaults.get("probe_concurrency", 256),
+            default_timeout=defaults.get("probe_timeout", 5),
+        )
 
-    def start_service(self, service_name):
+    def _journaled(self, service_name, command, operation, *args):
+        with self.journal.record("operation", service_name, command) as entry:
+            result = operation(*args)
+            entry["ok"] = result is not False
+        return result
+
+    def _coalesced(self, service_name, command, operation, *args):
+        def run():
+            with self.coordinator.service_lock(service_name):
+                result = self._journaled(
+                    service_name, command, operation, *args)
+            self.coordinator.invalidate("status")
+            return result
+
+        return self.coordinator.coalesce(f"{command}.{service_name}", run)
+
+    def sync_remote_files(self, service_names):
+        results = self.remote_sync.sync(service_names)
+        for service_name, result in results.items():
+            if result == "failed":
+                print(f"Failed to sync files for {service_name}.")
+        return results
+
+    def start_service(self, service_name, sync=True):
+        return self._coalesced(
+            service_name, "start", self._start_service, service_name, sync)
+
+    def _start_service(self, service_name, sync=True):
         if not self.config.is_service_enabled(service_name):
             print(f"Service {service_name} is not enabled.")
             return False
@@ -18,6 +59,10 @@ class ServiceManager:
             print(f"Compose file for {service_name} not found.")
             return False
 
+        if sync and self.sync_remote_files(
+                [service_name]).get(service_name) == "failed":
+            return False
+
         success = self.compose_handler.run_docker_compose(
             service_name, ["up", "-d"])
         if success:
@@ -25,6 +70,10 @@ class ServiceManager:
         return success
 
     def stop_service(self, service_name):
+        return self._coalesced(
+            service_name, "stop", self._stop_service, service_name)
+
+    def _stop_service(self, service_name):
         compose_file = self.compose_handler.get_compose_file(service_name)
         if not compose_file:
             print(f"Compose file for {service_name} not found.")
@@ -36,21 +85,167 @@ class ServiceManager:
             print(f"Service {service_name} stopped successfully.")
         return success
 
-    def start_all_services(self):
-        for service in self.config.get_enabled_services():
-            self.start_service(service["name"])
+    def restart_service(self, service_name):
+        return self._coalesced(
+            service_name, "restart", self._restart_service, service_name)
+
+    def _restart_service(self, service_name):
+        if not self.config.is_service_enabled(service_name):
+            print(f"Service {service_name} is not enabled.")
+            return False
+
+        if self.sync_remote_files([service_name]).get(service_name) == "failed":
+            return False
+
+        success = self.compose_handler.run_docker_compose(
+            service_name, ["up", "-d", "--force-recreate"])
+        if success:
+            print(f"Service {service_name} restarted successfully.")
+        return success
+
+    def snapshot_images(self, service_name):
+        return {
+            image: self.docker_utils.image_id(image)
+            for image in self.compose_handler.get_compose_images(service_name)
+        }
 
-    def stop_all_services(self):
-        for service in reversed(self.config.get_enabled_services()):
-            self.stop_service(service["name"])
+    def update_service(self, service_name):
+        return self._coalesced(
+            service_name, "update", self._update_service, service_name)
 
-    def service_status(self, service_name):
+    def _update_service(self, service_name):
+        if not self.config.is_service_enabled(service_name):
+            print(f"Service {service_name} is not enabled.")
+            return False
+
+        if self.sync_remote_files([service_name]).get(service_name) == "failed":
+            return False
+
+        if not self.compose_handler.run_docker_compose(service_name, ["pull"]):
+            return False
+
+        success = self.compose_handler.run_docker_compose(
+            service_name, ["up", "-d"])
+        if success:
+            print(f"Service {service_name} updated successfully.")
+        return success
+
+    def rollback_service(self, service_name, images):
+        with self.coordinator.service_lock(service_name):
+            result = self._journaled(
+                service_name, "rollback", self._rollback_service,
+                service_name, images)
+        self.coordinator.invalidate("status")
+        return result
+
+    def _rollback_service(self, service_name, images):
+        for image, image_id in images.items():
+            if image_id and not self.docker_utils.tag_image(image_id, image):
+                print(f"Failed to restore image {image} for {service_name}.")
+                return False
+
+        success = self.compose_handler.run_docker_compose(
+            service_name, ["up", "-d"])
+        if success:
+            print(f"Service {service_name} rolled back successfully.")
+        return success
+
+    def start_all_services(self, resume=False, run_id=None):
+        return self._journaled(
+            None, "start-all", self._start_all_services, resume, run_id)
+
+    def _start_all_services(self, resume=False, run_id=None):
+        names = [s["name"] for s in self.config.get_enabled_services()]
+        checkpoint = self._bulk_checkpoint("start-all", names, resume, run_id)
+        if checkpoint is None:
+            return False
+
+        # A service left in flight may have started before the interruption.
+        for name in checkpoint.in_flight():
+            running = self.service_status(name).startswith("Running")
+            checkpoint.mark(name, DONE if running else PENDING)
+
+        remaining = checkpoint.remaining()
+        # One batched sync per host instead of one per service.
+        synced = self.sync_remote_files(remaining) if remaining else {}
+        for name in remaining:
+            if synced.get(name) == "failed":
+                checkpoint.mark(name, FAILED)
+                continue
+            checkpoint.mark(name, IN_FLIGHT)
+            success = self.start_service(name, sync=False)
+            checkpoint.mark(name, DONE if success else FAILED)
+        return checkpoint.complete()
+
+    def stop_all_services(self, resume=False, run_id=None):
+        return self._journaled(
+            None, "stop-all", self._stop_all_services, resume, run_id)
+
+    def _stop_all_services(self, resume=False, run_id=None):
+        names = [s["name"] for s in
+                 reversed(self.config.get_enabled_services())]
+        checkpoint = self._bulk_checkpoint("stop-all", names, resume, run_id)
+        if checkpoint is None:
+            return False
+
+        for name in checkpoint.in_flight():
+            running = self.service_status(name).startswith("Running")
+            checkpoint.mark(name, PENDING if running else DONE)
+
+        for name in checkpoint.remaining():
+            checkpoint.mark(name, IN_FLIGHT)
+            success = self.stop_service(name)
+            checkpoint.mark(name, DONE if success else FAILED)
+        return checkpoint.complete()
+
+    def _bulk_checkpoint(self, operation, names, resume, run_id):
+        runs_dir = self.config.get_state_dir() / "runs"
+        if resume or run_id:
+            checkpoint = BulkCheckpoint.find(runs_dir, operation, run_id)
+            if checkpoint is None and run_id:
+                print(f"No readable {operation} run with id {run_id}.")
+                return None
+            if checkpoint is None:
+                print(f"No unfinished {operation} run to resume.")
+                return None
+            print(f"Resuming {operation} run {checkpoint.run_id}: "
+                  f"{len(checkpoint.remaining())} of "
+                  f"{len(checkpoint.services)} services left.")
+        else:
+            BulkCheckpoint.prune(runs_dir)
+            checkpoint = BulkCheckpoint.create(runs_dir, operation, names)
+            print(f"Started {operation} run {checkpoint.run_id}.")
+        self.last_run_id = checkpoint.run_id
+        return checkpoint
+
+    def run_probes(self, services):
+        probes_by_service = {}
+        for service in services:
+            probes = self.config.get_service_probes(service["name"])
+            if probes:
+                probes_by_service[service["name"]] = probes
+        return self.probe_engine.run(probes_by_service)
+
+    def has_health_source(self, service_name):
+        return bool(self.config.get_service_probes(service_name)) or \
+            self.docker_utils.container_has_healthcheck(service_name)
+
+    def service_is_healthy(self, service_name, probe_results=None):
+        probes = self.config.get_service_probes(service_name)
+        if not probes:
+            return self.docker_utils.container_is_healthy(service_name)
+
+        if probe_results is None or service_name not in probe_results:
+            probe_results = self.probe_engine.run({service_name: probes})
+        return all(result["ok"] for result in probe_results[service_name])
+
+    def service_status(self, service_name, probe_results=None):
         compose_file = self.compose_handler.get_compose_file(service_name)
         if not compose_file:
             return "Not configured"
 
         if self.docker_utils.container_is_running(service_name):
-            if self.docker_utils.container_is_healthy(service_name):
+            if self.service_is_healthy(service_name, probe_results):
                 return "Running (Healthy)"
             else:
                 return "Running (Unhealthy)"
@@ -60,17 +255,35 @@ class ServiceManager:
             return "Not running"
 
     def all_services_status(self):
+        return self.coordinator.coalesce(
+            "status",
+            lambda: self._journaled(None, "status", self._all_services_status),
+            max_age=self.coordinator.status_max_age)
+
+    def _all_services_status(self):
+        services = self.config.get_services()
+        probe_results = self.run_probes(services)
         return {
-            service["name"]: self.service_status(service["name"])
-            for service in self.config.get_services()
+            service["name"]: self.service_status(service["name"], probe_results)
+            for service in services
         }
 
     def check_all_services_healthy(self):
+        return self._journaled(
+            None, "health", self._check_all_services_healthy)
+
+    def _check_all_services_healthy(self):
         all_healthy = True
-        for service in self.config.get_enabled_services():
-            status = self.service_status(service["name"])
+        services = self.config.get_enabled_services()
+        probe_results = self.run_probes(services)
+        for service in services:
+            status = self.service_status(service["name"], probe_results)
             if status != "Running (Healthy)":
                 print(
                     f"Service {service['name']} is not healthy. Status: {status}")
+                for result in probe_results.get(service["name"], []):
+                    if not result["ok"]:
+                        print(
+                            f"  {result['type']} probe {result['target']} failed: {result['detail']}")
                 all_healthy = False
         return all_healthy
@@ -0,0 +1,42 @@
+import json
+import os
+import threading
+from pathlib import Path
+
+DEFAULT_PARALLEL_OPERATIONS = 4
+
+
+def parallel_operations(config, key="parallel_operations"):
+    # Feature-specific worker counts fall back to the global setting.
+    defaults = config.get_defaults()
+    return defaults.get(
+        key, defaults.get("parallel_operations", DEFAULT_PARALLEL_OPERATIONS))
+
+
+def write_json_atomic(path, data, fsync=False, **dump_options):
+    # Readers, including other processes, only ever see the old or the new
+    # file, never a partial write.
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(
+        f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, **dump_options)
+            if fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def run_periodically(task, interval, stop_event=None):
+    stop_event = stop_event or threading.Event()
+    while not stop_event.is_set():
+        task()
+        stop_event.wait(interval)
@@ -0,0 +1,99 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from homelab_manager.checkpoint import (DONE, FAILED, IN_FLIGHT, PENDING,
+                                        BulkCheckpoint)
+
+
+class TestBulkCheckpoint(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.runs_dir = Path(self.tmp_dir.name) / "runs"
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_create_and_reload(self):
+        checkpoint = BulkCheckpoint.create(self.runs_dir, "start-all", ["a", "b"])
+        checkpoint.mark("a", DONE)
+        checkpoint.mark("b", IN_FLIGHT)
+
+        loaded = BulkCheckpoint.load(checkpoint.path)
+        self.assertEqual(loaded.run_id, checkpoint.run_id)
+        self.assertEqual(loaded.states, {"a": DONE, "b": IN_FLIGHT})
+        self.assertEqual(loaded.in_flight(), ["b"])
+        self.assertEqual(loaded.remaining(), ["b"])
+
+    def test_complete_only_when_everything_done(self):
+        checkpoint = BulkCheckpoint.create(self.runs_dir, "stop-all", ["a", "b"])
+        checkpoint.mark("a", DONE)
+        checkpoint.mark("b", FAILED)
+        self.assertFalse(checkpoint.complete())
+        checkpoint.mark("b", DONE)
+        self.assertTrue(checkpoint.complete())
+        self.assertTrue(BulkCheckpoint.load(checkpoint.path).completed)
+
+    def test_find_latest_unfinished_run(self):
+        old = BulkCheckpoint.create(self.runs_dir, "start-all", ["a"])
+        old.created -= 10
+        old.save()
+        latest = BulkCheckpoint.create(self.runs_dir, "start-all", ["a"])
+        BulkCheckpoint.create(self.runs_dir, "stop-all", ["a"])
+        finished = BulkCheckpoint.create(self.runs_dir, "start-all", [])
+        finished.created -= 20
+        finished.complete()
+
+        found = BulkCheckpoint.find(self.runs_dir, "start-all")
+        self.assertEqual(found.run_id, latest.run_id)
+        self.assertEqual(
+            BulkCheckpoint.find(self.runs_dir, "start-all", old.run_id).run_id,
+            old.run_id)
+        self.assertIsNone(BulkCheckpoint.find(self.runs_dir, "restart"))
+        self.assertEqual(found.states, {"a": PENDING})
+
+    def test_find_skips_runs_older_than_a_completed_run(self):
+        stale = BulkCheckpoint.create(self.runs_dir, "start-all", ["a", "b"])
+        stale.created -= 10
+        stale.save()
+        fresh = BulkCheckpoint.create(self.runs_dir, "start-all", ["a"])
+        fresh.mark("a", DONE)
+        fresh.complete()
+
+        self.assertIsNone(BulkCheckpoint.find(self.runs_dir, "start-all"))
+        self.assertEqual(
+            BulkCheckpoint.find(self.runs_dir, "start-all", stale.run_id).run_id,
+            stale.run_id)
+
+        newer = BulkCheckpoint.create(self.runs_dir, "start-all", ["a"])
+        newer.created += 10
+        newer.save()
+        self.assertEqual(
+            BulkCheckpoint.find(self.runs_dir, "start-all").run_id,
+            newer.run_id)
+
+    def test_prune_keeps_newest_completed_and_all_unfinished(self):
+        unfinished = BulkCheckpoint.create(self.runs_dir, "start-all", ["a"])
+        unfinished.created -= 100
+        unfinished.save()
+        paths = []
+        for index in range(5):
+            checkpoint = BulkCheckpoint.create(self.runs_dir, "start-all", [])
+            checkpoint.created += index
+            checkpoint.complete()
+            paths.append(checkpoint.path)
+        BulkCheckpoint.prune(self.runs_dir, keep=2)
+        self.assertEqual(sorted(self.runs_dir.glob("*.json")),
+                         sorted(paths[3:] + [unfinished.path]))
+
+    def test_find_by_run_id_checks_operation(self):
+        start = BulkCheckpoint.create(self.runs_dir, "start-all", ["a"])
+        self.assertIsNone(
+            BulkCheckpoint.find(self.runs_dir, "stop-all", start.run_id))
+
+        start.path.write_text("{not json")
+        self.assertIsNone(
+            BulkCheckpoint.find(self.runs_dir, "start-all", start.run_id))
+
+if __name__ == "__main__":
+    unittest.main()
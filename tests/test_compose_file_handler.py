@@ -45,6 +45,23 @@ class TestComposeFileHandler(unittest.TestCase):
         result = self.compose_handler.get_compose_file("test_service")
         self.assertIsNone(result)
 
+    def test_get_compose_images(self):
+        with tempfile.NamedTemporaryFile(
+            "w", suffix=".yml", delete=False
+        ) as tmp_file:
+            tmp_file.write(
+                "services:\n"
+                "  web:\n    image: nginx:1\n"
+                "  proxy:\n    image: nginx:1\n"
+                "  app:\n    build: .\n")
+        self.compose_handler.get_compose_file = MagicMock(
+            return_value=tmp_file.name)
+        try:
+            images = self.compose_handler.get_compose_images("test_service")
+        finally:
+            os.unlink(tmp_file.name)
+        self.assertEqual(images, ["nginx:1"])
+
     @patch("subprocess.run")
     def test_run_docker_compose_success(self, mock_run):
         mock_run.return_value = MagicMock(
@@ -58,6 +75,19 @@ class TestComposeFileHandler(unittest.TestCase):
         self.assertTrue(result)
         mock_run.assert_called_once()
 
+    @patch("subprocess.run")
+    def test_run_docker_compose_remove_orphans_only_for_up_down(self, mock_run):
+        mock_run.return_value = MagicMock(returncode=0, stdout="", stderr="")
+        self.compose_handler.get_compose_file = MagicMock(
+            return_value="path/to/docker-compose.yml"
+        )
+
+        self.compose_handler.run_docker_compose("test_service", ["pull"])
+        self.assertNotIn("--remove-orphans", mock_run.call_args.args[0])
+
+        self.compose_handler.run_docker_compose("test_service", ["down"])
+        self.assertIn("--remove-orphans", mock_run.call_args.args[0])
+
     @patch("subprocess.run")
     def test_run_docker_compose_failure(self, mock_run):
         mock_run.side_effect = subprocess.CalledProcessError(1, "cmd")
@@ -36,6 +36,15 @@ class TestConfig(unittest.TestCase):
         self.assertEqual(len(core), 1)
         self.assertEqual(core[0]["name"], "core")
 
+    def test_get_state_dir(self):
+        self.config.config["defaults"] = {"state_dir": "/tmp/homelab-state"}
+        with patch.dict("os.environ", {}, clear=True):
+            self.assertEqual(
+                self.config.get_state_dir(),
+                Path("/tmp/homelab-state"))
+        with patch.dict("os.environ", {"HOMELAB_STATE_DIR": "/tmp/override"}):
+            self.assertEqual(self.config.get_state_dir(), Path("/tmp/override"))
+
     @patch("json.dump")
     @patch("builtins.open", new_callable=mock_open)
     def test_save_config(self, mock_file, mock_json_dump):
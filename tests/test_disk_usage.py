@@ -0,0 +1,207 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from homelab_manager.compose_file_handler import ComposeFileHandler
+from homelab_manager.config import Config
+from homelab_manager.disk_usage import DiskReclaimer, image_ref, parse_size
+
+
+class FakeTransport:
+    def __init__(self, usage, stuck=()):
+        self.usage = usage
+        self.stuck = set(stuck)
+        self.commands = []
+
+    def run(self, settings, command, input=None):
+        self.commands.append((settings["host"], command))
+        if command.startswith("docker system df"):
+            return MagicMock(stdout=json.dumps(self.usage[settings["host"]]))
+        removed = set()
+        for line in command.splitlines():
+            removed.update(line.split(" || ")[0].split()[2:])
+        removed -= self.stuck
+        host_usage = self.usage[settings["host"]]
+        for key, field in (("Images", "ID"), ("Containers", "ID"),
+                           ("Volumes", "Name")):
+            host_usage[key] = [entry for entry in host_usage[key]
+                               if entry[field] not in removed]
+        return MagicMock(stdout="")
+
+
+def usage(images=(), containers=(), volumes=()):
+    return {"Images": list(images), "Containers": list(containers),
+            "Volumes": list(volumes)}
+
+
+class TestDiskReclaimer(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        base = Path(self.tmp_dir.name)
+        for name, compose in {
+            "web": "services:\n  web:\n    image: nginx:1\n"
+                   "volumes:\n  data: {}\n",
+            "old": "services:\n  old:\n    image: legacy\n"
+                   "    container_name: legacy-app\n",
+        }.items():
+            (base / name).mkdir()
+            (base / name / "docker-compose.yml").write_text(compose)
+        config = {
+            "services": [
+                {"name": "web", "enabled": True,
+                 "compose_file": "web/docker-compose.yml"},
+                {"name": "old", "enabled": False,
+                 "compose_file": "old/docker-compose.yml"},
+                {"name": "db", "enabled": True, "host": "10.0.0.2",
+                 "compose_file": "web/docker-compose.yml"},
+            ],
+        }
+        config_path = base / "config.json"
+        config_path.write_text(json.dumps(config))
+        self.config = Config(config_path)
+
+        self.transport = FakeTransport({
+            "local": usage(
+                images=[
+                    {"ID": "i1", "Repository": "nginx", "Tag": "1",
+                     "Containers": "0", "Size": "150MB"},
+                    {"ID": "i2", "Repository": "nginx", "Tag": "0.9",
+                     "Containers": "0", "Size": "140MB", "UniqueSize": "20MB"},
+                    {"ID": "i3", "Repository": "legacy", "Tag": "latest",
+                     "Containers": "1", "Size": "1GB"},
+                    {"ID": "i4", "Repository": "<none>", "Tag": "<none>",
+                     "Containers": "0", "Size": "5kB"},
+                ],
+                containers=[
+                    {"ID": "c1", "Names": "web", "State": "exited",
+                     "Size": "1MB"},
+                    {"ID": "c2", "Names": "legacy-app", "State": "exited",
+                     "Size": "2MB (virtual 1GB)"},
+                    {"ID": "c3", "Names": "random", "State": "running",
+                     "Size": "3MB"},
+                    {"ID": "c4", "Names": "web-helper-1", "State": "exited",
+                     "Size": "4MB"},
+                ],
+                volumes=[
+                    {"Name": "web_data", "Links": "0", "Size": "500MB"},
+                    {"Name": "orphan", "Links": "0", "Size": "1GB"},
+                    {"Name": "mounted", "Links": "1", "Size": "1GB"},
+                ],
+            ),
+            "10.0.0.2": usage(volumes=[
+                {"Name": "remote-orphan", "Links": "0", "Size": "2GB"}]),
+        })
+        self.reclaimer = DiskReclaimer(
+            self.config, ComposeFileHandler(self.config),
+            transport=self.transport, local_transport=self.transport,
+            batch_size=2)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def reclaimable(self, host):
+        return {(item["type"], item["name"]): item
+                for item in self.reclaimer.collect()[host]["items"]}
+
+    def test_parse_size(self):
+        self.assertEqual(parse_size("1.5GB"), 1500000000)
+        self.assertEqual(parse_size("2MB (virtual 1GB)"), 2000000)
+        self.assertEqual(parse_size("0B"), 0)
+        self.assertEqual(parse_size(""), 0)
+
+    def test_image_ref(self):
+        self.assertEqual(image_ref("nginx"), "nginx:latest")
+        self.assertEqual(image_ref("registry:5000/app"), "registry:5000/app:latest")
+        self.assertEqual(image_ref("nginx:1"), "nginx:1")
+
+    def test_image_ref_normalizes_hub_references(self):
+        self.assertEqual(image_ref("docker.io/library/nginx:1"), "nginx:1")
+        self.assertEqual(image_ref("library/nginx"), "nginx:latest")
+        self.assertEqual(image_ref("docker.io/grafana/grafana"),
+                         "grafana/grafana:latest")
+        self.assertEqual(image_ref("nginx@sha256:abc"), "nginx@sha256:abc")
+
+    def test_hub_and_digest_references_are_protected(self):
+        base = Path(self.tmp_dir.name)
+        (base / "web" / "docker-compose.yml").write_text(
+            "services:\n  web:\n    image: docker.io/library/nginx:0.9\n"
+            "  cache:\n    image: redis@sha256:abc\n")
+        self.transport.usage["local"]["Images"].append(
+            {"ID": "i5", "Repository": "redis", "Tag": "<none>",
+             "Digest": "sha256:abc", "Containers": "0", "Size": "30MB"})
+        items = self.reclaimable("local")
+        self.assertNotIn(("image", "nginx:0.9"), items)
+        self.assertNotIn(("image", "redis:<none>"), items)
+
+    def test_built_images_are_protected(self):
+        base = Path(self.tmp_dir.name)
+        (base / "web" / "docker-compose.yml").write_text(
+            "services:\n  api:\n    build: .\n")
+        (base / "old" / "docker-compose.yml").write_text(
+            "services:\n  worker:\n    build: .\n")
+        self.transport.usage["local"]["Images"].extend([
+            {"ID": "i5", "Repository": "web-api", "Tag": "latest",
+             "Containers": "0", "Size": "30MB"},
+            {"ID": "i6", "Repository": "web_api", "Tag": "latest",
+             "Containers": "0", "Size": "30MB"},
+            {"ID": "i7", "Repository": "old-worker", "Tag": "latest",
+             "Containers": "0", "Size": "30MB"},
+        ])
+        items = self.reclaimable("local")
+        self.assertNotIn(("image", "web-api:latest"), items)
+        self.assertNotIn(("image", "web_api:latest"), items)
+        self.assertEqual(items[("image", "old-worker:latest")]["service"],
+                         "old")
+
+    def test_enabled_service_references_are_protected(self):
+        items = self.reclaimable("local")
+        self.assertNotIn(("image", "nginx:1"), items)
+        self.assertNotIn(("container", "web"), items)
+        self.assertNotIn(("container", "web-helper-1"), items)
+        self.assertNotIn(("volume", "web_data"), items)
+        self.assertNotIn(("volume", "mounted"), items)
+        self.assertNotIn(("container", "random"), items)
+
+    def test_reclaimable_items_attributed_to_services(self):
+        items = self.reclaimable("local")
+        self.assertEqual(items[("image", "nginx:0.9")]["bytes"], 20000000)
+        self.assertEqual(items[("image", "nginx:0.9")]["service"], "web")
+        self.assertEqual(items[("container", "legacy-app")]["service"], "old")
+        self.assertIsNone(items[("volume", "orphan")]["service"])
+        self.assertIn(("image", "<none>:<none>"), items)
+
+    def test_hosts_queried_once_each(self):
+        reports = self.reclaimer.collect()
+        self.assertEqual(sorted(reports), ["10.0.0.2", "local"])
+        self.assertEqual(len(self.transport.commands), 2)
+        self.assertEqual(
+            reports["10.0.0.2"]["totals"]["volume"], [2000000000, 2000000000])
+
+    def test_dry_run_removes_nothing(self):
+        self.reclaimer.prune(dry_run=True)
+        self.assertTrue(all(command.startswith("docker system df")
+                            for _, command in self.transport.commands))
+
+    def test_prune_removes_in_batches(self):
+        self.reclaimer.prune(["local"])
+        scripts = [command for host, command in self.transport.commands
+                   if not command.startswith("docker system df")]
+        self.assertEqual(len(scripts), 1)
+        lines = scripts[0].splitlines()
+        self.assertEqual(lines[0], "docker rm -f c2 || true")
+        self.assertEqual(lines[1], "docker rmi i2 i4 || true")
+        self.assertEqual(lines[2], "docker volume rm orphan || true")
+
+    def test_prune_reports_only_what_was_removed(self):
+        self.transport.stuck = {"i2"}
+        reports = self.reclaimer.prune(["local"])
+        removed = {item["id"]: item["removed"]
+                   for item in reports["local"]["items"]}
+        self.assertEqual(removed, {"i2": False, "i4": True, "c2": True,
+                                   "orphan": True})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -63,6 +63,14 @@ class TestDockerUtils(unittest.TestCase):
         self.assertFalse(
             self.docker_utils.container_is_healthy("error_container"))
 
+    @patch("subprocess.run")
+    def test_container_has_healthcheck(self, mock_run):
+        mock_run.return_value = MagicMock(stdout="yes\n")
+        self.assertTrue(self.docker_utils.container_has_healthcheck("web"))
+
+        mock_run.return_value = MagicMock(stdout="")
+        self.assertFalse(self.docker_utils.container_has_healthcheck("web"))
+
     @patch("subprocess.run")
     def test_remove_container(self, mock_run):
         mock_run.return_value = MagicMock(returncode=0)
@@ -72,6 +80,32 @@ class TestDockerUtils(unittest.TestCase):
         mock_run.side_effect = subprocess.CalledProcessError(1, "cmd")
         self.assertFalse(self.docker_utils.remove_container("error_container"))
 
+    @patch("subprocess.run")
+    def test_image_id(self, mock_run):
+        mock_run.return_value = MagicMock(stdout="sha256:abc\n")
+        self.assertEqual(self.docker_utils.image_id("nginx"), "sha256:abc")
+
+        mock_run.side_effect = subprocess.CalledProcessError(1, "cmd")
+        self.assertIsNone(self.docker_utils.image_id("missing"))
+
+    @patch("subprocess.run")
+    def test_pull_image(self, mock_run):
+        mock_run.return_value = MagicMock(returncode=0)
+        self.assertTrue(self.docker_utils.pull_image("nginx"))
+
+        mock_run.side_effect = subprocess.CalledProcessError(1, "cmd")
+        self.assertFalse(self.docker_utils.pull_image("missing"))
+
+    @patch("subprocess.run")
+    def test_container_logs(self, mock_run):
+        mock_run.return_value = MagicMock(stdout="out\n", stderr="err\n")
+        self.assertEqual(
+            self.docker_utils.container_logs("web", since=12.5), "out\nerr\n")
+        self.assertIn("12.500000", mock_run.call_args.args[0])
+
+        mock_run.side_effect = subprocess.CalledProcessError(1, "cmd")
+        self.assertIsNone(self.docker_utils.container_logs("missing"))
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -1,5 +1,6 @@
 import os
 import subprocess
+import tempfile
 import time
 import unittest
 
@@ -14,6 +15,12 @@ class TestFunctional(unittest.TestCase):
     def setUpClass(cls):
         cls.config_path = os.path.abspath("test_config.json")
         os.environ["HOMELAB_CONFIG"] = cls.config_path
+        # Keep the journal, run checkpoints and leases out of the real
+        # ~/.local/state/homelab-manager.
+        state_dir = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(state_dir.cleanup)
+        cls.addClassCleanup(os.environ.pop, "HOMELAB_STATE_DIR", None)
+        os.environ["HOMELAB_STATE_DIR"] = state_dir.name
 
         cls.config = Config(cls.config_path)
 
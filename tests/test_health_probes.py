@@ -0,0 +1,177 @@
+import socket
+import sys
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from homelab_manager.health_probes import ProbeEngine
+
+
+class ProbeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    connections = set()
+
+    def do_GET(self):
+        ProbeHandler.connections.add(self.client_address)
+        if self.path == "/slow":
+            time.sleep(0.3)
+        if self.path == "/chunked":
+            self.send_response(200)
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            for chunk in (b"all ", b"systems go"):
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+            self.wfile.write(b"0\r\n\r\n")
+            return
+        status = 503 if self.path == "/down" else 200
+        body = b"status: ok" if status == 200 else b"status: down"
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_HEAD(self):
+        ProbeHandler.connections.add(self.client_address)
+        self.send_response(200)
+        self.send_header("Content-Length", "10")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ProbeServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+class TestProbeEngine(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ProbeServer(("127.0.0.1", 0), ProbeHandler)
+        cls.port = cls.server.server_address[1]
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+
+        # Accepts connections but never answers, to exercise timeouts.
+        cls.silent = socket.socket()
+        cls.silent.bind(("127.0.0.1", 0))
+        cls.silent.listen(256)
+        cls.silent_port = cls.silent.getsockname()[1]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        cls.silent.close()
+
+    def setUp(self):
+        self.engine = ProbeEngine(default_timeout=2)
+        ProbeHandler.connections = set()
+
+    def tearDown(self):
+        self.engine.close()
+
+    def url(self, path):
+        return f"http://127.0.0.1:{self.port}{path}"
+
+    def run_one(self, probe):
+        return self.engine.run({"svc": [probe]})["svc"][0]
+
+    def test_http_probe_status_and_body(self):
+        result = self.run_one(
+            {"type": "http", "url": self.url("/"), "status": 200, "body": "ok"})
+        self.assertTrue(result["ok"], result)
+
+        result = self.run_one({"type": "http", "url": self.url("/down")})
+        self.assertFalse(result["ok"])
+        self.assertIn("503", result["detail"])
+
+        result = self.run_one(
+            {"type": "http", "url": self.url("/"), "body": "missing"})
+        self.assertFalse(result["ok"])
+
+    def test_http_probe_chunked_body(self):
+        result = self.run_one(
+            {"type": "http", "url": self.url("/chunked"), "body": "systems go"})
+        self.assertTrue(result["ok"], result)
+
+    def test_http_head_probe_reads_no_body(self):
+        probes = [{"type": "http", "url": self.url("/"), "method": "HEAD"}
+                  for _ in range(2)]
+        results = self.engine.run({"svc": probes})["svc"]
+        self.assertTrue(all(r["ok"] for r in results), results)
+        self.assertLess(max(r["elapsed"] for r in results), 1)
+
+    def test_http_connections_are_reused(self):
+        engine = ProbeEngine(max_concurrency=1, default_timeout=2)
+        results = engine.run(
+            {"svc": [{"type": "http", "url": self.url("/")} for _ in range(5)]})
+        self.assertTrue(all(r["ok"] for r in results["svc"]))
+        self.assertEqual(len(ProbeHandler.connections), 1)
+
+    def test_http_connections_are_reused_across_sweeps(self):
+        for _ in range(3):
+            results = self.engine.run(
+                {"svc": [{"type": "http", "url": self.url("/")}]})
+            self.assertTrue(results["svc"][0]["ok"], results)
+        self.assertEqual(len(ProbeHandler.connections), 1)
+        self.engine.close()
+        self.assertTrue(self.run_one(
+            {"type": "http", "url": self.url("/")})["ok"])
+
+    def test_invalid_probe_fails_without_breaking_sweep(self):
+        results = self.engine.run({
+            "bad": [{"type": "tcp", "host": "127.0.0.1"},
+                    {"type": "http"},
+                    {"type": "command", "command": None}],
+            "good": [{"type": "http", "url": self.url("/")}],
+        })
+        self.assertEqual([r["ok"] for r in results["bad"]], [False] * 3)
+        self.assertIn("missing 'port'", results["bad"][0]["detail"])
+        self.assertTrue(results["good"][0]["ok"])
+
+    def test_tcp_probe(self):
+        self.assertTrue(self.run_one(
+            {"type": "tcp", "host": "127.0.0.1", "port": self.port})["ok"])
+
+        with socket.socket() as unused:
+            unused.bind(("127.0.0.1", 0))
+            closed_port = unused.getsockname()[1]
+        self.assertFalse(self.run_one(
+            {"type": "tcp", "host": "127.0.0.1", "port": closed_port})["ok"])
+
+    def test_command_probe(self):
+        self.assertTrue(self.run_one(
+            {"type": "command", "command": [sys.executable, "-c", "pass"]})["ok"])
+        result = self.run_one(
+            {"type": "command",
+             "command": [sys.executable, "-c", "raise SystemExit(3)"]})
+        self.assertFalse(result["ok"])
+        self.assertIn("3", result["detail"])
+
+    def test_probe_timeout(self):
+        result = self.run_one(
+            {"type": "http", "url": f"http://127.0.0.1:{self.silent_port}/",
+             "timeout": 0.2})
+        self.assertFalse(result["ok"])
+        self.assertIn("timed out", result["detail"])
+
+    def test_probes_run_concurrently(self):
+        probes = {
+            f"svc{i}": [{"type": "http", "url": self.url("/slow")}]
+            for i in range(40)
+        }
+        started = time.monotonic()
+        results = self.engine.run(probes)
+        elapsed = time.monotonic() - started
+        self.assertTrue(all(r[0]["ok"] for r in results.values()))
+        self.assertLess(elapsed, 40 * 0.3 / 4)
+
+    def test_empty_probes_skip_event_loop(self):
+        self.assertEqual(self.engine.run({"svc": []}), {"svc": []})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,133 @@
+import json
+import tempfile
+import threading
+import time
+import unittest
+from pathlib import Path
+
+from homelab_manager.compose_file_handler import ComposeFileHandler
+from homelab_manager.config import Config
+from homelab_manager.image_prefetcher import ImagePrefetcher
+
+
+class FakeDocker:
+    def __init__(self, present=(), failing=()):
+        self.images = {image: f"sha256:{image}" for image in present}
+        self.failing = set(failing)
+        self.pulls = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def image_id(self, image):
+        return self.images.get(image)
+
+    def pull_image(self, image):
+        with self._lock:
+            self.pulls.append(image)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(0.05)
+        with self._lock:
+            self.active -= 1
+        if image in self.failing:
+            return False
+        self.images[image] = f"sha256:{image}"
+        return True
+
+
+class TestImagePrefetcher(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        base = Path(self.tmp_dir.name)
+        compose = {
+            "a": "services:\n  web:\n    image: nginx:1\n  db:\n    image: redis:7\n",
+            "b": "services:\n  app:\n    image: nginx:1\n  worker:\n    build: .\n",
+            "c": "services:\n  app:\n    image: busybox:1\n",
+        }
+        for name, content in compose.items():
+            (base / f"{name}.yml").write_text(content)
+        config = {
+            "services": [
+                {"name": "a", "enabled": True, "compose_file": "a.yml"},
+                {"name": "b", "enabled": True, "compose_file": "b.yml"},
+                {"name": "c", "enabled": False, "compose_file": "c.yml"},
+            ],
+            "defaults": {"state_dir": str(base / "state")},
+        }
+        config_path = base / "config.json"
+        config_path.write_text(json.dumps(config))
+        self.config = Config(config_path)
+        self.compose_handler = ComposeFileHandler(self.config)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def make_prefetcher(self, docker, **kwargs):
+        return ImagePrefetcher(
+            self.config, self.compose_handler, docker, **kwargs)
+
+    def test_required_images_deduplicated_for_enabled_services(self):
+        prefetcher = self.make_prefetcher(FakeDocker())
+        images = prefetcher.required_images()
+        self.assertEqual(
+            images, {"nginx:1": ["a", "b"], "redis:7": ["a"]})
+
+    def test_prefetch_pulls_missing_images_once(self):
+        docker = FakeDocker()
+        prefetcher = self.make_prefetcher(docker)
+        results = prefetcher.prefetch()
+        self.assertEqual(results, {"nginx:1": True, "redis:7": True})
+        self.assertEqual(sorted(docker.pulls), ["nginx:1", "redis:7"])
+
+        record = prefetcher.load_record()
+        self.assertEqual(record["nginx:1"]["services"], ["a", "b"])
+
+        self.assertEqual(prefetcher.prefetch(), {})
+        self.assertEqual(len(docker.pulls), 2)
+
+    def test_prefetch_refreshes_outdated_images(self):
+        docker = FakeDocker(present=["nginx:1", "redis:7"])
+        prefetcher = self.make_prefetcher(docker, max_age=60)
+        prefetcher.save_record({
+            "nginx:1": {"pulled_at": time.time()},
+            "redis:7": {"pulled_at": time.time() - 120},
+        })
+        prefetcher.prefetch()
+        self.assertEqual(docker.pulls, ["redis:7"])
+
+    def test_prefetch_respects_worker_limit(self):
+        docker = FakeDocker()
+        prefetcher = self.make_prefetcher(docker, max_workers=1)
+        prefetcher.prefetch()
+        self.assertEqual(docker.max_active, 1)
+
+    def test_failed_pull_not_recorded(self):
+        docker = FakeDocker(failing=["redis:7"])
+        prefetcher = self.make_prefetcher(docker)
+        results = prefetcher.prefetch()
+        self.assertFalse(results["redis:7"])
+        self.assertNotIn("redis:7", prefetcher.load_record())
+
+    def test_concurrent_prefetch_shares_pulls(self):
+        docker = FakeDocker()
+        prefetcher = self.make_prefetcher(docker)
+        threads = [threading.Thread(target=prefetcher.prefetch)
+                   for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(sorted(docker.pulls), ["nginx:1", "redis:7"])
+
+    def test_run_forever_stops(self):
+        docker = FakeDocker()
+        prefetcher = self.make_prefetcher(docker)
+        stop_event = threading.Event()
+        stop_event.set()
+        prefetcher.run_forever(1, stop_event=stop_event)
+        self.assertEqual(docker.pulls, [])
+
+
+if __name__ == "__main__":
+    unittest.main()
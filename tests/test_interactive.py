@@ -0,0 +1,93 @@
+import io
+import threading
+import unittest
+from unittest.mock import MagicMock
+
+from homelab_manager.interactive import InteractiveShell
+
+
+class TestInteractiveShell(unittest.TestCase):
+    def setUp(self):
+        self.manager = MagicMock()
+        self.manager.config.get_defaults.return_value = {}
+        self.manager.config.get_services.return_value = [
+            {"name": "service1"},
+            {"name": "service2"},
+        ]
+        self.statuses = {"service1": "Stopped", "service2": "Not running"}
+        self.manager.run_probes.return_value = {}
+        self.manager.service_status.side_effect = \
+            lambda name, probe_results=None: self.statuses[name]
+        self.output = io.StringIO()
+        self.shell = InteractiveShell(self.manager, stdout=self.output)
+
+    def tearDown(self):
+        self.shell.executor.shutdown(wait=True)
+
+    def run_command(self, line):
+        self.output.seek(0)
+        self.output.truncate()
+        stop = self.shell.onecmd(line)
+        self.shell.postcmd(stop, line)
+        return self.output.getvalue()
+
+    def test_status_redraws_only_changed_rows(self):
+        output = self.run_command("status")
+        self.assertIn("service1: Stopped", output)
+        self.assertIn("service2: Not running", output)
+
+        self.statuses["service1"] = "Running (Healthy)"
+        output = self.run_command("status")
+        self.assertIn("service1: Running (Healthy)", output)
+        self.assertNotIn("service2", output)
+
+        self.assertIn("No changes.", self.run_command("status"))
+        self.assertIn("service2", self.run_command("status --full"))
+
+    def test_status_runs_probes_once_per_refresh(self):
+        self.manager.run_probes.return_value = {"service1": []}
+        self.run_command("status")
+        self.manager.run_probes.assert_called_once_with(
+            self.manager.config.get_services.return_value)
+        self.manager.service_status.assert_any_call("service1", {"service1": []})
+
+    def test_status_reports_removed_services(self):
+        self.run_command("status")
+        self.manager.config.get_services.return_value = [{"name": "service1"}]
+        self.assertIn("service2: removed", self.run_command("status"))
+
+    def test_start_runs_in_background(self):
+        release = threading.Event()
+        self.manager.start_service.side_effect = lambda name: release.wait(5)
+
+        output = self.run_command("start service1")
+        self.assertIn("[1] start service1 started in background", output)
+        self.assertIn("running", self.run_command("jobs"))
+
+        release.set()
+        self.run_command("wait")
+        self.assertIn("[1] start service1: done", self.output.getvalue())
+        self.manager.start_service.assert_called_once_with("service1")
+
+    def test_hyphenated_commands(self):
+        self.run_command("start-all")
+        self.run_command("wait")
+        self.manager.start_all_services.assert_called_once()
+
+    def test_failed_job_reported(self):
+        self.manager.stop_service.return_value = False
+        self.run_command("stop service1")
+        self.run_command("wait")
+        self.assertIn("[1] stop service1: failed", self.run_command("jobs"))
+
+    def test_reload_keeps_manager(self):
+        self.run_command("reload")
+        self.manager.config.load_config.assert_called_once()
+        self.assertIs(self.shell.manager, self.manager)
+
+    def test_quit(self):
+        self.assertTrue(self.shell.onecmd("quit"))
+
+
+if __name__ == "__main__":
+    unittest.main()
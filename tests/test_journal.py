@@ -0,0 +1,153 @@
+import multiprocessing
+import tempfile
+import unittest
+from pathlib import Path
+
+from homelab_manager.journal import (LatencyHistogram, OperationJournal,
+                                     summarize_journal)
+
+
+class TestOperationJournal(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp_dir.name) / "journal.jsonl"
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_record_appends_entry(self):
+        journal = OperationJournal(self.path)
+        with journal.record("compose", "web", "up -d") as entry:
+            entry["ok"] = True
+            entry["exit_code"] = 0
+
+        records = list(journal.iter_records())
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]["kind"], "compose")
+        self.assertEqual(records[0]["command"], "up -d")
+        self.assertTrue(records[0]["ok"])
+        self.assertIn("end", records[0])
+
+    def test_record_marks_exceptions_failed(self):
+        journal = OperationJournal(self.path)
+        with self.assertRaises(RuntimeError):
+            with journal.record("operation", "web", "start"):
+                raise RuntimeError("boom")
+        self.assertFalse(list(journal.iter_records())[0]["ok"])
+
+    def test_every_record_has_exit_code_and_output_bytes(self):
+        journal = OperationJournal(self.path)
+        with journal.record("operation", "web", "start") as operation:
+            with journal.record("compose", "web", "pull") as entry:
+                entry.update(ok=True, exit_code=0, output_bytes=100)
+            with journal.record("compose", "web", "up -d") as entry:
+                entry.update(exit_code=2, output_bytes=20)
+        with journal.record("operation", "web", "stop") as operation:
+            operation["ok"] = True
+
+        records = {record["command"]: record
+                   for record in journal.iter_records()}
+        self.assertEqual(records["start"]["exit_code"], 1)
+        self.assertEqual(records["start"]["output_bytes"], 120)
+        self.assertEqual(records["up -d"]["exit_code"], 2)
+        self.assertEqual(records["stop"]["exit_code"], 0)
+        self.assertEqual(records["stop"]["output_bytes"], 0)
+
+    def test_rotation_by_size(self):
+        journal = OperationJournal(self.path, max_bytes=200, backup_count=2)
+        for index in range(20):
+            journal.append({"index": index, "start": 0, "end": 1})
+
+        self.assertTrue(journal.backup_path(1).exists())
+        self.assertTrue(journal.backup_path(2).exists())
+        self.assertFalse(journal.backup_path(3).exists())
+        for path in journal.files():
+            self.assertLessEqual(path.stat().st_size, 200)
+
+        indexes = [record["index"] for record in journal.iter_records()]
+        self.assertEqual(indexes, sorted(indexes))
+        self.assertEqual(indexes[-1], 19)
+
+    def test_rotation_across_processes_keeps_every_entry(self):
+        def write_entries(worker):
+            journal = OperationJournal(
+                self.path, max_bytes=2000, backup_count=1000)
+            for index in range(100):
+                journal.append({"worker": worker, "index": index})
+
+        context = multiprocessing.get_context("fork")
+        workers = [context.Process(target=write_entries, args=(worker,))
+                   for worker in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+        journal = OperationJournal(self.path, max_bytes=2000, backup_count=1000)
+        records = list(journal.iter_records())
+        self.assertEqual(len(records), 400)
+        for path in journal.files()[:-1]:
+            self.assertGreater(path.stat().st_size, 1000)
+
+    def test_iter_records_skips_corrupt_lines(self):
+        self.path.write_text('{"start": 0, "end": 1}\nnot json\n')
+        journal = OperationJournal(self.path)
+        self.assertEqual(len(list(journal.iter_records())), 1)
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    def test_percentiles_within_bucket_error(self):
+        histogram = LatencyHistogram()
+        for index in range(1, 1001):
+            histogram.add(index / 100)
+
+        self.assertEqual(histogram.count, 1000)
+        self.assertAlmostEqual(histogram.percentile(50), 5.0, delta=0.3)
+        self.assertAlmostEqual(histogram.percentile(95), 9.5, delta=0.5)
+        self.assertLessEqual(histogram.percentile(99), 10.0)
+
+    def test_memory_is_bounded(self):
+        histogram = LatencyHistogram()
+        for index in range(100000):
+            histogram.add(1 + index % 7)
+        self.assertLessEqual(len(histogram.buckets), 7)
+
+
+class TestSummarizeJournal(unittest.TestCase):
+    def test_summary_and_trend(self):
+        records = [
+            {"kind": "operation", "service": "web", "command": "start",
+             "start": 0, "end": 5, "ok": True},
+            {"kind": "operation", "service": "web", "command": "start",
+             "start": 86400, "end": 86490, "ok": False},
+            {"kind": "compose", "service": "web", "command": "up -d",
+             "start": 0, "end": 4, "ok": True},
+            {"kind": "operation", "service": "db", "command": "start",
+             "start": 10},
+        ]
+        summary, trends = summarize_journal(
+            iter(records), period="day", kind="operation")
+
+        key = ("operation", "web", "start")
+        self.assertEqual(list(summary), [key])
+        self.assertEqual(summary[key].count, 2)
+        self.assertEqual(summary[key].failures, 1)
+        self.assertEqual(sorted(trends[key]), [0, 86400])
+        self.assertAlmostEqual(
+            trends[key][86400].percentile(50), 90, delta=5)
+
+    def test_filters(self):
+        records = [
+            {"kind": "operation", "service": "web", "command": "start",
+             "start": 100, "end": 101, "ok": True},
+            {"kind": "operation", "service": "db", "command": "stop",
+             "start": 0, "end": 1, "ok": True},
+        ]
+        summary, _ = summarize_journal(iter(records), since=50)
+        self.assertEqual(list(summary), [("operation", "web", "start")])
+        summary, _ = summarize_journal(iter(records), command="stop")
+        self.assertEqual(list(summary), [("operation", "db", "stop")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+import io
+import json
+import tempfile
+import threading
+import time
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+
+from homelab_manager.locking import OperationCoordinator, lease_name
+
+
+class TestOperationCoordinator(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.coordinator = OperationCoordinator(
+            Path(self.tmp_dir.name) / "leases")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_lease_name_is_filesystem_safe(self):
+        self.assertEqual(lease_name("start.my app/x"), "start.my_app_x")
+
+    def test_concurrent_callers_share_one_run(self):
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def operation():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return {"ok": len(calls)}
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(
+            self.coordinator.coalesce("start.web", operation)))
+        leader.start()
+        started.wait(5)
+
+        followers = [threading.Thread(target=lambda: results.append(
+            self.coordinator.coalesce("start.web", operation)))
+            for _ in range(3)]
+        for follower in followers:
+            follower.start()
+        time.sleep(0.1)
+        release.set()
+        for thread in [leader] + followers:
+            thread.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{"ok": 1}] * 4)
+
+    def test_sequential_callers_run_again(self):
+        calls = []
+
+        def operation():
+            calls.append(1)
+            return len(calls)
+
+        self.assertEqual(self.coordinator.coalesce("stop.web", operation), 1)
+        self.assertEqual(self.coordinator.coalesce("stop.web", operation), 2)
+
+    def test_recent_result_is_reused_within_max_age(self):
+        calls = []
+
+        def operation():
+            calls.append(1)
+            return len(calls)
+
+        self.assertEqual(self.coordinator.coalesce("status", operation, 60), 1)
+        self.assertEqual(self.coordinator.coalesce("status", operation, 60), 1)
+        self.coordinator.invalidate("status")
+        self.assertEqual(self.coordinator.coalesce("status", operation, 60), 2)
+
+    def test_expired_result_is_not_reused(self):
+        self.coordinator.lease_dir.mkdir(parents=True)
+        self.coordinator.result_path("status").write_text(
+            json.dumps({"finished": time.time() - 60, "value": "old"}))
+
+        self.assertEqual(
+            self.coordinator.coalesce("status", lambda: "new", 5), "new")
+        self.assertEqual(self.coordinator.read_result("status")["value"], "new")
+
+    def test_results_are_namespaced_per_config(self):
+        other = OperationCoordinator(self.coordinator.lease_dir, namespace="b")
+        mine = OperationCoordinator(self.coordinator.lease_dir, namespace="a")
+        self.assertEqual(other.coalesce("status", lambda: "b", 60), "b")
+        self.assertEqual(mine.coalesce("status", lambda: "a", 60), "a")
+        self.assertEqual(other.coalesce("status", lambda: "new", 60), "b")
+
+    def test_unwritable_lease_dir_runs_uncoordinated(self):
+        blocker = Path(self.tmp_dir.name) / "file"
+        blocker.write_text("")
+        coordinator = OperationCoordinator(blocker / "leases")
+
+        with redirect_stdout(io.StringIO()) as output:
+            self.assertEqual(coordinator.coalesce("start.web", lambda: 1), 1)
+            self.assertEqual(coordinator.coalesce("status", lambda: 2, 5), 2)
+            with coordinator.service_lock("web"):
+                pass
+        self.assertIn("running uncoordinated", output.getvalue())
+
+    def test_service_lock_serializes_operations(self):
+        events = []
+
+        def hold(name):
+            with self.coordinator.service_lock("web"):
+                events.append(f"{name}-in")
+                time.sleep(0.05)
+                events.append(f"{name}-out")
+
+        threads = [threading.Thread(target=hold, args=(name,))
+                   for name in ("a", "b")]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(events[0][0], events[1][0])
+        self.assertEqual(events[2][0], events[3][0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from homelab_manager.log_archive import (LogArchive, LogCollector,
+                                         parse_docker_timestamp,
+                                         parse_duration)
+
+HOUR = 3600
+
+
+class TestLogArchive(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root = Path(self.tmp_dir.name) / "logs"
+        self.archive = LogArchive(self.root, partition_seconds=HOUR)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_parse_helpers(self):
+        self.assertEqual(parse_duration("2h"), 7200)
+        self.assertEqual(parse_duration("30m"), 1800)
+        self.assertEqual(parse_duration("45"), 45)
+        with self.assertRaises(ValueError):
+            parse_duration("soon")
+        self.assertEqual(
+            parse_docker_timestamp("1970-01-01T00:01:00.123456789Z"),
+            60.123456)
+        self.assertIsNone(parse_docker_timestamp("not-a-timestamp"))
+
+    def test_append_partitions_and_indexes(self):
+        self.archive.append("web", [(10, "GET /index 200"),
+                                    (HOUR + 5, "GET /health 200")])
+        self.archive.append("db", [(20, "checkpoint complete")])
+
+        partitions = [start for start, _ in self.archive.partitions()]
+        self.assertEqual(partitions, [0, HOUR])
+
+        index = self.archive.load_index(self.root / "0")
+        self.assertEqual(index["services"]["web"]["start"], 10)
+        self.assertEqual(index["tokens"]["checkpoint"], ["db"])
+        self.assertEqual(sorted(index["tokens"]["get"]), ["web"])
+
+    def test_search_uses_token_index(self):
+        self.archive.append("web", [(10, "GET /index 200")])
+        self.archive.append("db", [(20, "Connection REFUSED by peer")])
+
+        results = list(self.archive.search("refused"))
+        self.assertEqual(results, [(20.0, "db", "Connection REFUSED by peer")])
+
+        # Services whose index lacks the token are never decompressed.
+        (self.root / "0" / "web.log.gz").write_bytes(b"corrupt")
+        self.assertEqual(len(list(self.archive.search("refused"))), 1)
+
+    def test_search_matches_partial_words(self):
+        self.archive.append("web", [(10, "GET /index 200")])
+        self.archive.append("db", [(20, "dial tcp: connection refused")])
+        (self.root / "0" / "web.log.gz").write_bytes(b"corrupt")
+
+        for term in ("refuse", "tcp: conn", "ection ref", "connection refused"):
+            self.assertEqual(
+                [line for _, _, line in self.archive.search(term)],
+                ["dial tcp: connection refused"], term)
+        self.assertEqual(list(self.archive.search("tcp: connections")), [])
+
+    def test_search_since_and_services(self):
+        self.archive.append("web", [(10, "error one"),
+                                    (2 * HOUR + 10, "error two")])
+        self.archive.append("db", [(2 * HOUR + 20, "error three")])
+
+        results = list(self.archive.search("error", since=2 * HOUR))
+        self.assertEqual([line for _, _, line in results],
+                         ["error two", "error three"])
+        results = list(self.archive.search("error", services=["web"]))
+        self.assertEqual(len(results), 2)
+
+    def test_appending_to_existing_segment(self):
+        self.archive.append("web", [(10, "first")])
+        self.archive.append("web", [(11, "second")])
+        self.assertEqual(len(list(self.archive.search("second"))), 1)
+        self.assertEqual(len(list(self.archive.search("first"))), 1)
+        index = self.archive.load_index(self.root / "0")
+        self.assertEqual(index["services"]["web"]["lines"], 2)
+        self.assertEqual(index["services"]["web"]["end"], 11)
+
+    def test_retention_by_age_and_size(self):
+        for hour in range(5):
+            self.archive.append("web", [(hour * HOUR, "line " * 50)])
+
+        self.archive.max_age = 2 * HOUR
+        removed = self.archive.enforce_retention(now=5 * HOUR)
+        self.assertEqual(removed, [0, HOUR])
+
+        self.archive.max_age = None
+        self.archive.max_bytes = 1
+        self.archive.enforce_retention(now=5 * HOUR)
+        self.assertEqual([start for start, _ in self.archive.partitions()],
+                         [4 * HOUR])
+
+
+class TestLogCollector(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        base = Path(self.tmp_dir.name)
+        self.archive = LogArchive(base / "logs")
+        self.config = MagicMock()
+        self.config.get_defaults.return_value = {}
+        self.config.get_services.return_value = [
+            {"name": "web"}, {"name": "db"}]
+        self.docker_utils = MagicMock()
+        self.logs = {
+            "web": "1970-01-01T00:00:10.000000000Z started\n"
+                   "1970-01-01T00:00:20.000000000Z listening on 80\n",
+            "db": None,
+        }
+        self.docker_utils.container_logs.side_effect = \
+            lambda name, since=None: self.logs[name]
+        self.collector = LogCollector(
+            self.config, self.archive, self.docker_utils)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_collect_is_incremental(self):
+        self.assertEqual(self.collector.collect(), {"web": 2, "db": 0})
+        self.assertEqual(self.collector.load_cursors(), {"web": 20.0})
+
+        self.logs["web"] += "1970-01-01T00:00:30.000000000Z stopping\n"
+        self.assertEqual(self.collector.collect(["web"]), {"web": 1})
+        self.docker_utils.container_logs.assert_called_with("web", since=20.0)
+        self.assertEqual(
+            [line for _, _, line in self.archive.search("listening")],
+            ["listening on 80"])
+        with open(self.collector.cursor_path) as f:
+            self.assertEqual(json.load(f)["web"], 30.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
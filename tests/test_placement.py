@@ -0,0 +1,159 @@
+import json
+import tempfile
+import time
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock
+
+from homelab_manager.compose_file_handler import ComposeFileHandler
+from homelab_manager.config import Config
+from homelab_manager.placement import PlacementEngine, parse_memory
+
+GIB = 1024 ** 3
+
+
+class TestPlacementEngine(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.base = Path(self.tmp_dir.name)
+        (self.base / "big.yml").write_text(
+            "services:\n  app:\n    image: app\n    deploy:\n"
+            "      resources:\n        limits:\n"
+            "          cpus: '2'\n          memory: 4g\n")
+        (self.base / "small.yml").write_text(
+            "services:\n  app:\n    image: app\n    mem_limit: 512m\n"
+            "    cpus: 0.5\n")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def make_engine(self, services, hosts=None, shell=None):
+        config_path = self.base / "config.json"
+        config_path.write_text(json.dumps(
+            {"services": services, "hosts": hosts or {}}))
+        self.config = Config(config_path)
+        return PlacementEngine(
+            self.config, ComposeFileHandler(self.config), shell=shell)
+
+    def service(self, name, compose="small.yml", **extra):
+        return dict({"name": name, "enabled": True, "host": "auto",
+                     "compose_file": compose}, **extra)
+
+    def inventory(self, *names, cpus=4, memory=8 * GIB):
+        return {name: {"cpus": cpus, "memory": memory, "disk": None}
+                for name in names}
+
+    def test_parse_memory(self):
+        self.assertEqual(parse_memory("512m"), 512 * 1024 ** 2)
+        self.assertEqual(parse_memory("2GiB"), 2 * GIB)
+        self.assertEqual(parse_memory("100MiB "), 100 * 1024 ** 2)
+        self.assertEqual(parse_memory(1024), 1024)
+        with self.assertRaises(ValueError):
+            parse_memory("lots")
+
+    def test_requirements_from_compose_config_and_observed(self):
+        (self.base / "bare.yml").write_text("services:\n  app:\n    image: x\n")
+        engine = self.make_engine([self.service("big", "big.yml"),
+                                   self.service("bare", "bare.yml")])
+        big = engine.service_requirements(self.service("big", "big.yml"))
+        self.assertEqual(big["cpus"], 2.0)
+        self.assertEqual(big["memory"], 4 * GIB)
+
+        overridden = engine.service_requirements(
+            self.service("big", "big.yml", resources={"memory": "1g"}))
+        self.assertEqual(overridden["memory"], GIB)
+
+        observed = engine.service_requirements(
+            self.service("bare", "bare.yml"),
+            observed={"bare": {"cpus": 0.3, "memory": GIB}})
+        self.assertEqual(observed["cpus"], 0.3)
+        self.assertEqual(observed["memory"], GIB)
+
+    def test_spread_balances_hosts(self):
+        engine = self.make_engine(
+            [self.service(f"svc{i}") for i in range(4)])
+        plan = engine.plan(self.inventory("a", "b"))
+        hosts = sorted(plan["assignments"].values())
+        self.assertEqual(hosts, ["a", "a", "b", "b"])
+        self.assertEqual(plan["unplaced"], [])
+
+    def test_pack_fills_one_host_first(self):
+        engine = self.make_engine(
+            [self.service(f"svc{i}") for i in range(4)])
+        plan = engine.plan(self.inventory("a", "b"), strategy="pack")
+        self.assertEqual(len(set(plan["assignments"].values())), 1)
+
+    def test_pinned_services_consume_capacity(self):
+        engine = self.make_engine([
+            self.service("pinned", "big.yml", host="a"),
+            self.service("auto1", "big.yml"),
+        ])
+        plan = engine.plan(self.inventory("a", "b", cpus=3))
+        self.assertEqual(plan["assignments"], {"auto1": "b"})
+
+    def test_unplaceable_service(self):
+        engine = self.make_engine([self.service("huge", "big.yml")])
+        plan = engine.plan(self.inventory("a", cpus=1))
+        self.assertEqual(plan["unplaced"], ["huge"])
+
+    def test_anti_affinity(self):
+        engine = self.make_engine([
+            self.service("db1", anti_affinity="db"),
+            self.service("db2", anti_affinity="db"),
+            self.service("db3", anti_affinity="db"),
+        ])
+        plan = engine.plan(self.inventory("a", "b"), strategy="pack")
+        self.assertEqual(len(plan["assignments"]), 2)
+        self.assertEqual(len(set(plan["assignments"].values())), 2)
+        self.assertEqual(len(plan["unplaced"]), 1)
+
+    def test_colocation_hints(self):
+        engine = self.make_engine([
+            self.service("db", host="b"),
+            self.service("app", colocate=True, depends_on=["db"]),
+            self.service("worker", colocate_with=["app"]),
+            self.service("other"),
+        ])
+        plan = engine.plan(self.inventory("a", "b"))
+        self.assertEqual(plan["assignments"]["app"], "b")
+        self.assertEqual(plan["assignments"]["worker"], "b")
+
+    def test_apply_saves_placed_host(self):
+        engine = self.make_engine([self.service("svc"),
+                                   self.service("fixed", host="a")])
+        plan = engine.plan(self.inventory("a", "b"))
+        self.assertEqual(engine.apply(plan), 1)
+
+        saved = Config(self.base / "config.json")
+        service = saved.get_service("svc")
+        self.assertEqual(service["host"], "auto")
+        self.assertEqual(saved.get_service_host(service),
+                         plan["assignments"]["svc"])
+        self.assertEqual(engine.apply(plan), 0)
+
+    def test_inventory_gathers_missing_capacity(self):
+        shell = MagicMock()
+        shell.run.return_value = (
+            "8 16000000000\n/dev/sda1 3000 1000 2000 33% /var/lib/docker\n")
+        engine = self.make_engine(
+            [], hosts={"a": {"cpus": 2}, "b": {}}, shell=shell)
+        inventory = engine.host_inventory()
+        self.assertEqual(inventory["a"]["cpus"], 2)
+        self.assertEqual(inventory["a"]["memory"], 16000000000)
+        self.assertEqual(inventory["b"]["disk"], 3000 * 1024)
+        self.assertEqual(shell.run.call_count, 2)
+
+    def test_scales_to_thousands_of_services(self):
+        engine = self.make_engine(
+            [self.service(f"svc{i}", anti_affinity=f"g{i % 10}")
+             for i in range(2000)])
+        inventory = self.inventory(
+            *[f"host{i}" for i in range(50)], cpus=64, memory=256 * GIB)
+        started = time.monotonic()
+        plan = engine.plan(inventory)
+        self.assertLess(time.monotonic() - started, 30)
+        self.assertEqual(len(plan["assignments"]) + len(plan["unplaced"]), 2000)
+
+
+if __name__ == "__main__":
+    unittest.main()
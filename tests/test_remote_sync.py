@@ -0,0 +1,170 @@
+import io
+import json
+import subprocess
+import tarfile
+import tempfile
+import unittest
+from pathlib import Path
+
+from homelab_manager.compose_file_handler import ComposeFileHandler
+from homelab_manager.config import Config
+from homelab_manager.remote_sync import RemoteSync, SshTransport
+
+
+class LocalShellTransport:
+    """Runs "remote" commands with sh in a per-host home directory."""
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self.calls = []
+
+    def home(self, host):
+        path = self.root / host
+        path.mkdir(parents=True, exist_ok=True)
+        return path
+
+    def run(self, settings, remote_command, input=None):
+        self.calls.append((settings["host"], remote_command, input))
+        return subprocess.run(
+            ["sh", "-c", remote_command],
+            cwd=self.home(settings["host"]),
+            input=input,
+            check=True,
+            capture_output=True,
+        )
+
+
+class TestRemoteSync(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.base = Path(self.tmp_dir.name)
+        for name in ("web", "db", "local"):
+            (self.base / f"{name}.yml").write_text(f"services: {{{name}: {{}}}}\n")
+            (self.base / f"{name}.env").write_text(f"NAME={name}\n")
+        config = {
+            "services": [
+                {"name": "web", "enabled": True, "host": "host-a",
+                 "compose_file": "web.yml", "env_file": "web.env"},
+                {"name": "db", "enabled": True, "host": "host-a",
+                 "compose_file": "db.yml", "env_file": "db.env"},
+                {"name": "cache", "enabled": True, "host": "host-b",
+                 "compose_file": "db.yml", "remote_dir": "apps/cache"},
+                {"name": "local", "enabled": True,
+                 "compose_file": "local.yml"},
+            ],
+            "defaults": {"ssh_user": "admin"},
+        }
+        config_path = self.base / "config.json"
+        config_path.write_text(json.dumps(config))
+        self.config = Config(config_path)
+        self.transport = LocalShellTransport(self.base / "remote")
+        self.sync = RemoteSync(
+            self.config, ComposeFileHandler(self.config), self.transport)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def remote(self, host, path):
+        return self.base / "remote" / host / path
+
+    def transfers(self):
+        return [call for call in self.transport.calls if call[2] is not None]
+
+    def test_initial_sync_copies_all_files(self):
+        results = self.sync.sync()
+        self.assertEqual(
+            results, {"web": "synced", "db": "synced", "cache": "synced"})
+        self.assertEqual(
+            self.remote("host-a", ".dockerlab/web/web.env").read_text(),
+            "NAME=web\n")
+        self.assertTrue(
+            self.remote("host-a", ".dockerlab/db/docker-compose.yml").exists())
+        self.assertTrue(
+            self.remote("host-b", "apps/cache/docker-compose.yml").exists())
+        # One batched transfer per host, no leftover staging directories.
+        self.assertEqual(len(self.transfers()), 2)
+        self.assertEqual(
+            [p.name for p in self.remote("host-a", ".dockerlab").iterdir()
+             if p.name.startswith(".staging")], [])
+
+    def test_resync_transfers_only_changed_files(self):
+        self.sync.sync()
+        self.transport.calls = []
+
+        self.assertEqual(
+            self.sync.sync(),
+            {"web": "unchanged", "db": "unchanged", "cache": "unchanged"})
+        self.assertEqual(self.transfers(), [])
+
+        (self.base / "web.env").write_text("NAME=web2\n")
+        results = self.sync.sync()
+        self.assertEqual(results["web"], "synced")
+        self.assertEqual(results["db"], "unchanged")
+
+        transfers = self.transfers()
+        self.assertEqual(len(transfers), 1)
+        with tarfile.open(fileobj=io.BytesIO(transfers[0][2])) as archive:
+            self.assertEqual(sorted(archive.getnames()),
+                             ["web/manifest.json", "web/web.env"])
+        self.assertEqual(
+            self.remote("host-a", ".dockerlab/web/web.env").read_text(),
+            "NAME=web2\n")
+
+    def test_sync_selected_services(self):
+        self.assertEqual(self.sync.sync(["db", "local"]), {"db": "synced"})
+        self.assertFalse(self.remote("host-a", ".dockerlab/web").exists())
+
+    def test_failed_transfer_leaves_manifest(self):
+        self.sync.sync(["web"])
+        manifest_path = self.remote("host-a", ".dockerlab/web/.sync/current/manifest.json")
+        manifest = manifest_path.read_text()
+
+        # An unreadable archive fails before anything is moved into place.
+        self.sync.build_archive = lambda changes: b"not a tar"
+        (self.base / "web.env").write_text("NAME=changed\n")
+        self.assertEqual(self.sync.sync(["web"]), {"web": "failed"})
+        self.assertEqual(manifest_path.read_text(), manifest)
+        self.assertEqual(
+            self.remote("host-a", ".dockerlab/web/web.env").read_text(),
+            "NAME=web\n")
+
+    def test_failing_service_does_not_affect_others(self):
+        self.sync.sync(["web"])
+        # A plain file where db's directory should be makes only db fail.
+        self.remote("host-a", ".dockerlab/db").write_text("")
+        (self.base / "web.env").write_text("NAME=web2\n")
+
+        self.assertEqual(self.sync.sync(["web", "db"]),
+                         {"web": "synced", "db": "failed"})
+        self.assertEqual(
+            self.remote("host-a", ".dockerlab/web/web.env").read_text(),
+            "NAME=web2\n")
+        versions = list(self.remote("host-a", ".dockerlab/web/.sync").glob("v.*"))
+        self.assertEqual(len(versions), 1)
+
+        self.remote("host-a", ".dockerlab/db").unlink()
+        self.assertEqual(self.sync.sync(["web", "db"]),
+                         {"web": "unchanged", "db": "synced"})
+
+    def test_existing_plain_files_are_migrated(self):
+        web = self.remote("host-a", ".dockerlab/web")
+        web.mkdir(parents=True)
+        (web / "web.env").write_text("NAME=old\n")
+        (web / "data").write_text("kept\n")
+
+        self.assertEqual(self.sync.sync(["web"]), {"web": "synced"})
+        self.assertTrue((web / "web.env").is_symlink())
+        self.assertEqual((web / "web.env").read_text(), "NAME=web\n")
+        self.assertEqual((web / "data").read_text(), "kept\n")
+
+    def test_ssh_command(self):
+        command = SshTransport().command(
+            {"host": "10.0.0.2", "user": "admin", "key": None, "port": 2222},
+            "true")
+        self.assertEqual(
+            command,
+            ["ssh", "-o", "BatchMode=yes", "-p", "2222", "admin@10.0.0.2", "true"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,138 @@
+import unittest
+from unittest.mock import MagicMock
+
+from homelab_manager.rolling import (RollingExecutor, dependency_levels,
+                                     resolve_wave_size)
+
+
+class FakeManager:
+    def __init__(self, dependencies=None, failing=(), unhealthy=(),
+                 unchecked=()):
+        self.config = MagicMock()
+        self.config.get_service_dependencies.side_effect = \
+            lambda name: (dependencies or {}).get(name, [])
+        self.failing = set(failing)
+        self.unhealthy = set(unhealthy)
+        self.unchecked = set(unchecked)
+        self.probe_sweeps = []
+        self.calls = []
+        self.rollbacks = []
+
+    def restart_service(self, name):
+        self.calls.append(("restart", name))
+        return name not in self.failing
+
+    def update_service(self, name):
+        self.calls.append(("update", name))
+        return name not in self.failing
+
+    def snapshot_images(self, name):
+        return {f"{name}:latest": f"sha256:{name}"}
+
+    def rollback_service(self, name, images):
+        self.rollbacks.append((name, images))
+        return True
+
+    def run_probes(self, services):
+        self.probe_sweeps.append([service["name"] for service in services])
+        return {}
+
+    def has_health_source(self, name):
+        return name not in self.unchecked
+
+    def service_status(self, name, probe_results=None):
+        if name in self.unhealthy or name in self.unchecked:
+            return "Running (Unhealthy)"
+        return "Running (Healthy)"
+
+
+class TestWavePlanning(unittest.TestCase):
+    def test_resolve_wave_size(self):
+        self.assertEqual(resolve_wave_size("2", 10), 2)
+        self.assertEqual(resolve_wave_size(3, 10), 3)
+        self.assertEqual(resolve_wave_size("25%", 10), 3)
+        self.assertEqual(resolve_wave_size("1%", 10), 1)
+
+    def test_dependency_levels(self):
+        manager = FakeManager({"app": ["db"], "proxy": ["app"]})
+        levels = dependency_levels(
+            manager.config, ["proxy", "app", "db", "cache"])
+        self.assertEqual(levels, [["db", "cache"], ["app"], ["proxy"]])
+
+    def test_dependency_cycle(self):
+        manager = FakeManager({"a": ["b"], "b": ["a"]})
+        with self.assertRaises(ValueError):
+            dependency_levels(manager.config, ["a", "b"])
+
+    def test_waves_respect_size_and_dependencies(self):
+        manager = FakeManager({"app": ["db"]})
+        executor = RollingExecutor(manager, wave_size=2)
+        waves = executor.plan_waves(["a", "b", "c", "db", "app"])
+        self.assertEqual(waves, [["a", "b"], ["c", "db"], ["app"]])
+
+
+class TestRollingExecutor(unittest.TestCase):
+    def test_restart_all_waves(self):
+        manager = FakeManager()
+        executor = RollingExecutor(manager, wave_size=2, poll_interval=0)
+        report = executor.run("restart", ["a", "b", "c"])
+        self.assertFalse(report["aborted"])
+        self.assertEqual(len(report["waves"]), 2)
+        self.assertEqual(
+            sorted(manager.calls),
+            [("restart", "a"), ("restart", "b"), ("restart", "c")])
+        for wave in report["waves"]:
+            self.assertGreaterEqual(wave["seconds"], 0)
+
+    def test_stops_when_failure_rate_exceeded(self):
+        manager = FakeManager(failing=["b"])
+        executor = RollingExecutor(manager, wave_size=2, poll_interval=0)
+        report = executor.run("restart", ["a", "b", "c", "d"])
+        self.assertTrue(report["aborted"])
+        self.assertEqual(len(report["waves"]), 1)
+        self.assertEqual(report["waves"][0]["failed"], ["b"])
+        self.assertNotIn(("restart", "c"), manager.calls)
+
+    def test_failure_rate_threshold_allows_some_failures(self):
+        manager = FakeManager(failing=["b"])
+        executor = RollingExecutor(
+            manager, wave_size=2, max_failure_rate=0.5, poll_interval=0)
+        report = executor.run("restart", ["a", "b", "c", "d"])
+        self.assertFalse(report["aborted"])
+        self.assertEqual(len(manager.calls), 4)
+
+    def test_unhealthy_wave_rolls_back_update(self):
+        manager = FakeManager(unhealthy=["c"])
+        executor = RollingExecutor(
+            manager, wave_size=2, rollback=True,
+            health_timeout=0, poll_interval=0)
+        report = executor.run("update", ["a", "b", "c", "d"])
+        self.assertTrue(report["aborted"])
+        self.assertEqual(report["waves"][1]["failed"], ["c"])
+        self.assertEqual(report["rolled_back"], ["d", "c", "b", "a"])
+        self.assertIn(("a", {"a:latest": "sha256:a"}), manager.rollbacks)
+
+    def test_health_wait_probes_once_per_poll(self):
+        manager = FakeManager(unhealthy=["b"])
+        executor = RollingExecutor(
+            manager, wave_size=3, health_timeout=0, poll_interval=0)
+        executor.run("restart", ["a", "b", "c"])
+        self.assertEqual(manager.probe_sweeps, [["a", "b", "c"]])
+
+    def test_running_is_enough_without_health_source(self):
+        manager = FakeManager(unchecked=["a"], unhealthy=["b"])
+        executor = RollingExecutor(
+            manager, wave_size=2, health_timeout=0, poll_interval=0)
+        report = executor.run("restart", ["a", "b"])
+        self.assertEqual(report["waves"][0]["failed"], ["b"])
+
+    def test_running_is_enough_without_health_check(self):
+        manager = FakeManager(unhealthy=["a"])
+        executor = RollingExecutor(
+            manager, require_healthy=False, health_timeout=0, poll_interval=0)
+        report = executor.run("restart", ["a"])
+        self.assertFalse(report["aborted"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,4 +1,6 @@
+import tempfile
 import unittest
+from pathlib import Path
 from unittest.mock import MagicMock, patch
 
 from homelab_manager.service_manager import ServiceManager
@@ -6,13 +8,26 @@ from homelab_manager.service_manager import ServiceManager
 
 class TestServiceManager(unittest.TestCase):
     def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
         self.mock_config = MagicMock()
+        self.mock_config.get_state_dir.return_value = Path(self.tmp_dir.name)
+        self.mock_config.get_defaults.return_value = {}
+        self.mock_config.get_config_id.return_value = "test"
         self.mock_docker_utils = MagicMock()
         self.mock_compose_handler = MagicMock()
+        self.mock_config.get_service_probes.return_value = []
 
         self.service_manager = ServiceManager(self.mock_config)
         self.service_manager.docker_utils = self.mock_docker_utils
         self.service_manager.compose_handler = self.mock_compose_handler
+        self.mock_probe_engine = MagicMock()
+        self.service_manager.probe_engine = self.mock_probe_engine
+        self.mock_remote_sync = MagicMock()
+        self.mock_remote_sync.sync.return_value = {}
+        self.service_manager.remote_sync = self.mock_remote_sync
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
 
     def test_start_service_success(self):
         self.mock_config.is_service_enabled.return_value = True
@@ -25,6 +40,14 @@ class TestServiceManager(unittest.TestCase):
             "test_service", ["up", "-d"]
         )
 
+    def test_start_service_sync_failure(self):
+        self.mock_config.is_service_enabled.return_value = True
+        self.mock_compose_handler.get_compose_file.return_value = "path/to/compose.yml"
+        self.mock_remote_sync.sync.return_value = {"test_service": "failed"}
+
+        self.assertFalse(self.service_manager.start_service("test_service"))
+        self.mock_compose_handler.run_docker_compose.assert_not_called()
+
     def test_start_service_not_enabled(self):
         self.mock_config.is_service_enabled.return_value = False
         result = self.service_manager.start_service("test_service")
@@ -51,6 +74,24 @@ class TestServiceManager(unittest.TestCase):
         result = self.service_manager.stop_service("test_service")
         self.assertFalse(result)
 
+    def test_update_service(self):
+        self.mock_config.is_service_enabled.return_value = True
+        self.mock_compose_handler.run_docker_compose.return_value = True
+
+        self.assertTrue(self.service_manager.update_service("test_service"))
+        self.assertEqual(
+            [c.args[1] for c in self.mock_compose_handler.run_docker_compose.call_args_list],
+            [["pull"], ["up", "-d"]])
+
+    def test_rollback_service_restores_images(self):
+        self.mock_docker_utils.tag_image.return_value = True
+        self.mock_compose_handler.run_docker_compose.return_value = True
+
+        self.assertTrue(self.service_manager.rollback_service(
+            "test_service", {"nginx:latest": "sha256:old"}))
+        self.mock_docker_utils.tag_image.assert_called_once_with(
+            "sha256:old", "nginx:latest")
+
     def test_start_all_services(self):
         self.mock_config.get_enabled_services.return_value = [
             {"name": "service1"},
@@ -60,6 +101,8 @@ class TestServiceManager(unittest.TestCase):
 
         self.service_manager.start_all_services()
         self.assertEqual(self.service_manager.start_service.call_count, 2)
+        self.mock_remote_sync.sync.assert_called_once_with(
+            ["service1", "service2"])
 
     def test_stop_all_services(self):
         self.mock_config.get_enabled_services.return_value = [
@@ -71,6 +114,49 @@ class TestServiceManager(unittest.TestCase):
         self.service_manager.stop_all_services()
         self.assertEqual(self.service_manager.stop_service.call_count, 2)
 
+    def test_start_all_services_resume(self):
+        self.mock_config.get_enabled_services.return_value = [
+            {"name": "service1"},
+            {"name": "service2"},
+            {"name": "service3"},
+        ]
+        self.service_manager.start_service = MagicMock(
+            side_effect=[True, False, KeyboardInterrupt()])
+        with self.assertRaises(KeyboardInterrupt):
+            self.service_manager.start_all_services()
+        run_id = self.service_manager.last_run_id
+
+        # service2 failed and service3 was interrupted while in flight but
+        # turns out to be running already.
+        self.service_manager.service_status = MagicMock(
+            return_value="Running (Healthy)")
+        self.service_manager.start_service = MagicMock(return_value=True)
+        self.assertTrue(self.service_manager.start_all_services(resume=True))
+        self.assertEqual(self.service_manager.last_run_id, run_id)
+        self.service_manager.start_service.assert_called_once_with(
+            "service2", sync=False)
+        self.service_manager.service_status.assert_called_once_with("service3")
+
+        self.assertFalse(self.service_manager.start_all_services(resume=True))
+
+    def test_stop_all_services_resume_verifies_in_flight(self):
+        self.mock_config.get_enabled_services.return_value = [
+            {"name": "service1"},
+            {"name": "service2"},
+        ]
+        self.service_manager.stop_service = MagicMock(
+            side_effect=KeyboardInterrupt())
+        with self.assertRaises(KeyboardInterrupt):
+            self.service_manager.stop_all_services()
+
+        self.service_manager.service_status = MagicMock(
+            return_value="Running (Healthy)")
+        self.service_manager.stop_service = MagicMock(return_value=True)
+        self.assertTrue(self.service_manager.stop_all_services(resume=True))
+        self.assertEqual(
+            [c.args[0] for c in self.service_manager.stop_service.call_args_list],
+            ["service2", "service1"])
+
     def test_service_status_running_healthy(self):
         self.mock_compose_handler.get_compose_file.return_value = "path/to/compose.yml"
         self.mock_docker_utils.container_is_running.return_value = True
@@ -117,6 +203,21 @@ class TestServiceManager(unittest.TestCase):
             statuses, {"service1": "Running (Healthy)", "service2": "Stopped"}
         )
 
+    def test_all_services_status_reuses_recent_sweep(self):
+        self.mock_config.get_services.return_value = [{"name": "service1"}]
+        self.service_manager.service_status = MagicMock(
+            return_value="Running (Healthy)")
+
+        self.service_manager.all_services_status()
+        self.service_manager.all_services_status()
+        self.assertEqual(self.service_manager.service_status.call_count, 1)
+
+        self.mock_compose_handler.get_compose_file.return_value = "compose.yml"
+        self.mock_compose_handler.run_docker_compose.return_value = True
+        self.service_manager.stop_service("service1")
+        self.service_manager.all_services_status()
+        self.assertEqual(self.service_manager.service_status.call_count, 2)
+
     def test_check_all_services_healthy(self):
         self.mock_config.get_enabled_services.return_value = [
             {"name": "service1"},
@@ -129,6 +230,51 @@ class TestServiceManager(unittest.TestCase):
         result = self.service_manager.check_all_services_healthy()
         self.assertFalse(result)
 
+    def test_service_status_uses_probes(self):
+        probes = [{"type": "tcp", "host": "localhost", "port": 80}]
+        self.mock_config.get_service_probes.return_value = probes
+        self.mock_compose_handler.get_compose_file.return_value = "path/to/compose.yml"
+        self.mock_docker_utils.container_is_running.return_value = True
+        self.mock_probe_engine.run.return_value = {
+            "test_service": [{"ok": True}]}
+
+        status = self.service_manager.service_status("test_service")
+        self.assertEqual(status, "Running (Healthy)")
+        self.mock_probe_engine.run.assert_called_once_with(
+            {"test_service": probes})
+        self.mock_docker_utils.container_is_healthy.assert_not_called()
+
+    def test_check_all_services_healthy_probes_once(self):
+        self.mock_config.get_enabled_services.return_value = [
+            {"name": "service1"},
+            {"name": "service2"},
+        ]
+        self.mock_config.get_service_probes.return_value = [
+            {"type": "tcp", "host": "localhost", "port": 80}]
+        self.mock_compose_handler.get_compose_file.return_value = "path/to/compose.yml"
+        self.mock_docker_utils.container_is_running.return_value = True
+        self.mock_probe_engine.run.return_value = {
+            "service1": [{"ok": True}],
+            "service2": [{"ok": False, "type": "tcp",
+                          "target": "localhost:80", "detail": "refused"}],
+        }
+
+        self.assertFalse(self.service_manager.check_all_services_healthy())
+        self.mock_probe_engine.run.assert_called_once()
+
+    def test_operations_are_journaled(self):
+        self.mock_config.is_service_enabled.return_value = True
+        self.mock_compose_handler.get_compose_file.return_value = "path/to/compose.yml"
+        self.mock_compose_handler.run_docker_compose.return_value = False
+
+        self.service_manager.start_service("test_service")
+        records = list(self.service_manager.journal.iter_records())
+        self.assertEqual(len(records), 1)
+        self.assertEqual(records[0]["service"], "test_service")
+        self.assertEqual(records[0]["command"], "start")
+        self.assertFalse(records[0]["ok"])
+        self.assertGreaterEqual(records[0]["end"], records[0]["start"])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,61 @@
+import json
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import MagicMock, patch
+
+from homelab_manager.utils import (parallel_operations, run_periodically,
+                                   write_json_atomic)
+
+
+class TestUtils(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = Path(self.tmp_dir.name) / "state" / "data.json"
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_write_json_atomic(self):
+        write_json_atomic(self.path, {"a": 1}, fsync=True, indent=2)
+        with open(self.path) as f:
+            self.assertEqual(json.load(f), {"a": 1})
+        self.assertEqual(list(self.path.parent.iterdir()), [self.path])
+
+    def test_write_json_atomic_keeps_old_file_on_failure(self):
+        write_json_atomic(self.path, {"a": 1})
+        with patch("homelab_manager.utils.os.replace",
+                   side_effect=OSError("disk full")):
+            with self.assertRaises(OSError):
+                write_json_atomic(self.path, {"a": 2})
+        with open(self.path) as f:
+            self.assertEqual(json.load(f), {"a": 1})
+        self.assertEqual(list(self.path.parent.iterdir()), [self.path])
+
+    def test_parallel_operations(self):
+        config = MagicMock()
+        config.get_defaults.return_value = {}
+        self.assertEqual(parallel_operations(config), 4)
+        config.get_defaults.return_value = {"parallel_operations": 8}
+        self.assertEqual(parallel_operations(config), 8)
+        self.assertEqual(parallel_operations(config, "prefetch_workers"), 8)
+        config.get_defaults.return_value = {"parallel_operations": 8,
+                                            "prefetch_workers": 2}
+        self.assertEqual(parallel_operations(config, "prefetch_workers"), 2)
+
+    def test_run_periodically_stops(self):
+        stop_event = threading.Event()
+        calls = []
+
+        def task():
+            calls.append(1)
+            if len(calls) == 3:
+                stop_event.set()
+
+        run_periodically(task, 0, stop_event)
+        self.assertEqual(len(calls), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()